@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Búsqueda Automática de Capacidad (Knee Finder) - Teknigo
+Sube la carga sobre la mezcla de usuarios del locustfile hasta encontrar el
+punto donde el p99 o la tasa de errores rompen el SLO, y reporta el máximo
+RPS sostenible con intervalo de confianza
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from locust.env import Environment
+
+from locustfile import TeknigoUser, TechnicianUser, AdminUser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../python-scripts'))
+from perf_baseline import percentile, bootstrap_ci
+
+
+def coefficient_of_variation(values):
+    mean = sum(values) / len(values)
+    if mean == 0:
+        return 0.0
+    variance = sum((v - mean) ** 2 for v in values) / len(values)
+    return variance ** 0.5 / mean
+
+
+class CapacitySearch:
+    def __init__(self, host="http://localhost:3000", slo_p99_ms=2000, slo_error_rate=0.01,
+                 warmup=30, window=10, min_windows=3, max_windows=12, steady_cv=0.15,
+                 spawn_rate=50, user_classes=None):
+        """Inicializar búsqueda de capacidad
+
+        La carga se controla por número de usuarios concurrentes (modelo
+        cerrado con los wait_time del locustfile); el RPS ofrecido resultante
+        se mide por ventana.
+        """
+        self.slo_p99_ms = slo_p99_ms
+        self.slo_error_rate = slo_error_rate
+        self.warmup = warmup
+        self.window = window
+        self.min_windows = min_windows
+        self.max_windows = max_windows
+        self.steady_cv = steady_cv
+        self.spawn_rate = spawn_rate
+        self.lock = threading.Lock()
+        self.levels = []
+        self._reset_window()
+
+        self.env = Environment(
+            user_classes=user_classes or [TeknigoUser, TechnicianUser, AdminUser],
+            host=host
+        )
+        self.env.events.request.add_listener(self._on_request)
+        self.runner = self.env.create_local_runner()
+
+    def _reset_window(self):
+        self._latencies = []
+        self._failures = 0
+        self._per_second = {}
+
+    def _on_request(self, request_type, name, response_time, response_length, exception=None, **kwargs):
+        with self.lock:
+            self._latencies.append(response_time)
+            second = int(time.time())
+            self._per_second[second] = self._per_second.get(second, 0) + 1
+            if exception is not None:
+                self._failures += 1
+
+    def _collect_window(self):
+        """Cerrar la ventana actual y devolver sus métricas"""
+        start_time = time.time()
+        time.sleep(self.window)
+        with self.lock:
+            latencies, failures, per_second = self._latencies, self._failures, self._per_second
+            self._reset_window()
+        end_time = time.time()
+        elapsed = end_time - start_time
+        # Solo segundos completos dentro de la ventana (los bordes son parciales)
+        second_rps = [per_second.get(s, 0) for s in range(int(start_time) + 1, int(end_time))]
+        latencies.sort()
+        total = len(latencies)
+        return {
+            'requests': total,
+            'rps': total / elapsed,
+            'p50_ms': percentile(latencies, 50),
+            'p99_ms': percentile(latencies, 99),
+            'error_rate': failures / total if total else 0.0,
+            'latencies': latencies,
+            'failures': failures,
+            'second_rps': second_rps
+        }
+
+    def _is_steady(self, windows):
+        """Estado estable: RPS y p50 sin deriva en las últimas ventanas"""
+        recent = windows[-self.min_windows:]
+        if len(recent) < self.min_windows or any(w['requests'] == 0 for w in recent):
+            return False
+        return (coefficient_of_variation([w['rps'] for w in recent]) <= self.steady_cv and
+                coefficient_of_variation([w['p50_ms'] for w in recent]) <= self.steady_cv)
+
+    def measure_level(self, users):
+        """Medir un nivel de carga: warm-up descartado y ventanas hasta estabilizar"""
+        print(f"\n📶 Nivel: {users} usuarios")
+        self.runner.start(users, spawn_rate=self.spawn_rate)
+
+        # Esperar a que terminen de crearse los usuarios y descartar el warm-up
+        time.sleep(users / self.spawn_rate + self.warmup)
+        with self.lock:
+            self._reset_window()
+
+        windows = []
+        steady = False
+        while len(windows) < self.max_windows:
+            windows.append(self._collect_window())
+            w = windows[-1]
+            print(f"   ⏱️  rps={w['rps']:.1f} p50={w['p50_ms']:.0f}ms "
+                  f"p99={w['p99_ms']:.0f}ms errores={w['error_rate']*100:.2f}%")
+            if self._is_steady(windows):
+                steady = True
+                break
+
+        recent = windows[-self.min_windows:]
+        latencies = sorted(l for w in recent for l in w['latencies'])
+        requests = sum(w['requests'] for w in recent)
+        failures = sum(w['failures'] for w in recent)
+        rps_samples = [w['rps'] for w in recent]
+        # El IC se remuestrea sobre el RPS por segundo, no sobre solo min_windows medias
+        second_rps = [rps for w in recent for rps in w['second_rps']]
+
+        level = {
+            'users': users,
+            'steady': steady,
+            'rps': sum(rps_samples) / len(rps_samples),
+            'rps_samples': rps_samples,
+            'second_rps': second_rps,
+            'p99_ms': percentile(latencies, 99),
+            'error_rate': failures / requests if requests else 1.0
+        }
+        # Un nivel que nunca se estabiliza (colas creciendo) no es sostenible
+        level['passed'] = (steady and
+                           level['p99_ms'] <= self.slo_p99_ms and
+                           level['error_rate'] <= self.slo_error_rate)
+        self.levels.append(level)
+
+        verdict = "✅ Cumple SLO" if level['passed'] else "❌ Rompe SLO"
+        if not steady:
+            verdict += " (sin estado estable)"
+        print(f"   {verdict}: rps={level['rps']:.1f} p99={level['p99_ms']:.0f}ms "
+              f"errores={level['error_rate']*100:.2f}%")
+        return level
+
+    def run(self, start_users=10, max_users=1000, step_factor=2, precision=0.1):
+        """Búsqueda escalonada (x step_factor) seguida de búsqueda binaria"""
+        print(f"🚀 Iniciando búsqueda de capacidad")
+        print(f"🎯 SLO: p99 <= {self.slo_p99_ms}ms, errores <= {self.slo_error_rate*100:.2f}%")
+
+        best = None
+        failed_users = None
+        users = start_users
+
+        try:
+            # Fase 1: escalones hasta romper el SLO
+            while users <= max_users:
+                level = self.measure_level(users)
+                if not level['passed']:
+                    failed_users = users
+                    break
+                best = level
+                users = int(users * step_factor)
+
+            # Fase 2: búsqueda binaria entre el último nivel bueno y el primero malo
+            low = best['users'] if best else 0
+            high = failed_users
+            while high is not None and high - low > max(1, low * precision):
+                middle = (low + high) // 2
+                if middle in (low, high):
+                    break
+                level = self.measure_level(middle)
+                if level['passed']:
+                    best, low = level, middle
+                else:
+                    high = middle
+            failed_users = high
+        finally:
+            self.runner.quit()
+
+        return self._summary(best, failed_users)
+
+    def _summary(self, best, failed_users):
+        print("\n" + "="*60)
+        print("📊 RESULTADO DE BÚSQUEDA DE CAPACIDAD")
+        print("="*60)
+
+        summary = {
+            'slo': {'p99_ms': self.slo_p99_ms, 'error_rate': self.slo_error_rate},
+            'levels': self.levels,
+            'max_sustainable': None
+        }
+        if best is None:
+            print("❌ Ningún nivel cumplió el SLO; reduce start_users")
+            return summary
+
+        ci_low, ci_high = bootstrap_ci([best['second_rps'] or best['rps_samples']], lambda v: sum(v) / len(v))
+        summary['max_sustainable'] = {
+            'users': best['users'],
+            'rps': best['rps'],
+            'rps_ci95': [ci_low, ci_high],
+            'p99_ms': best['p99_ms'],
+            'error_rate': best['error_rate'],
+            'knee_users': failed_users
+        }
+        print(f"👥 Usuarios máximos sostenibles: {best['users']}")
+        print(f"📈 RPS máximo sostenible: {best['rps']:.1f} (IC95%: {ci_low:.1f} - {ci_high:.1f})")
+        print(f"⏱️  p99 en ese nivel: {best['p99_ms']:.0f}ms")
+        if failed_users:
+            print(f"📉 El SLO se rompe a partir de ~{failed_users} usuarios")
+        else:
+            print("💡 No se alcanzó el knee; aumenta max_users")
+        return summary
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Búsqueda automática de capacidad con Locust")
+    parser.add_argument('--host', default='http://localhost:3000')
+    parser.add_argument('--slo-p99', type=float, default=2000, help="p99 máximo en ms")
+    parser.add_argument('--slo-errors', type=float, default=0.01, help="Tasa de errores máxima (0-1)")
+    parser.add_argument('--warmup', type=float, default=30, help="Segundos descartados por nivel")
+    parser.add_argument('--window', type=float, default=10, help="Segundos por ventana de medición")
+    parser.add_argument('--start-users', type=int, default=10)
+    parser.add_argument('--max-users', type=int, default=1000)
+    parser.add_argument('--precision', type=float, default=0.1, help="Precisión relativa de la búsqueda binaria")
+    parser.add_argument('--output', help="Guardar el resultado en JSON")
+    args = parser.parse_args()
+
+    print("🔍 BÚSQUEDA DE CAPACIDAD - TEKNIGO")
+    print("="*50)
+
+    search = CapacitySearch(
+        host=args.host,
+        slo_p99_ms=args.slo_p99,
+        slo_error_rate=args.slo_errors,
+        warmup=args.warmup,
+        window=args.window
+    )
+    summary = search.run(
+        start_users=args.start_users,
+        max_users=args.max_users,
+        precision=args.precision
+    )
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        print(f"💾 Resultado guardado en {args.output}")
+
+    if summary['max_sustainable'] is None:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,73 @@
 # Instalación
 # pip install locust
 
-from locust import HttpUser, task, between
+from locust import HttpUser, task, between, events
+from locust.runners import MasterRunner, WorkerRunner
+import os
+import sys
 import random
 import json
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../python-scripts'))
+from resource_monitor import ResourceMonitor
+from perf_baseline import RunRecorder
+
+# Cuentas creadas por python-scripts/auth_provisioner.py (mismos valores por defecto)
+CLIENT_ACCOUNTS = int(os.environ.get('STRESS_CLIENT_ACCOUNTS', 1000))
+TECH_ACCOUNTS = int(os.environ.get('STRESS_TECH_ACCOUNTS', 100))
+
+# Generador de búsquedas con tasa de aciertos de caché controlada (ver search_params.py)
+from search_params import generator_from_env
+SEARCH_PARAMS = generator_from_env()
+
+@events.init.add_listener
+def start_generator_monitor(environment, **kwargs):
+    """Monitorear los recursos de cada worker (o del runner local)"""
+    if isinstance(environment.runner, MasterRunner):
+        return
+    environment.generator_monitor = ResourceMonitor('locust_worker').start()
+
+@events.test_start.add_listener
+def partition_search_keys(environment, **kwargs):
+    """Repartir las claves de búsqueda entre workers: [cold] sigue siendo frío en ejecuciones distribuidas"""
+    workers = int(os.environ.get('STRESS_SEARCH_WORKERS', 1))
+    if SEARCH_PARAMS is None or workers <= 1 or not isinstance(environment.runner, WorkerRunner):
+        return
+    # worker_index lo asigna el master al empezar la prueba
+    SEARCH_PARAMS.partition(environment.runner.worker_index % workers, workers)
+
+@events.quitting.add_listener
+def save_run(environment, **kwargs):
+    """Guardar distribuciones por endpoint para perf_baseline.py (master o runner local)"""
+    if isinstance(environment.runner, WorkerRunner):
+        return
+    entries = environment.stats.entries.values()
+    if not entries:
+        return
+    recorder = RunRecorder('locust')
+    for entry in entries:
+        scenario = f"{entry.method} {entry.name}"
+        for millis, count in entry.response_times.items():
+            recorder.add_latency(scenario, millis / 1000, count)
+        # Una muestra de throughput por segundo de la ejecución
+        for second, count in entry.num_reqs_per_sec.items():
+            recorder.add_completions(scenario, count, second)
+    recorder.save()
+
+@events.quitting.add_listener
+def report_generator_monitor(environment, **kwargs):
+    """Marcar la ejecución como no confiable si el generador se saturó"""
+    monitor = getattr(environment, 'generator_monitor', None)
+    if monitor is None:
+        return
+    monitor.stop()
+    monitor.print_summary()
+    if SEARCH_PARAMS is not None:
+        print(f"🔍 Búsquedas: {SEARCH_PARAMS.summary()}")
+    if not monitor.trustworthy:
+        environment.process_exit_code = 2
+
 class TeknigoUser(HttpUser):
     wait_time = between(1, 3)  # Tiempo de espera entre requests
     
@@ -21,7 +83,7 @@ class TeknigoUser(HttpUser):
         # En una app real de Firebase, esto sería diferente
         # Aquí simulamos las llamadas que hace tu app
         login_data = {
-            "email": f"user_{random.randint(1, 1000)}@test.com",
+            "email": f"user_{random.randint(1, CLIENT_ACCOUNTS)}@test.com",
             "password": "password123"
         }
         
@@ -77,6 +139,16 @@ class TeknigoUser(HttpUser):
     @task(1)
     def search_technicians(self):
         """Simula búsqueda de técnicos"""
+        if SEARCH_PARAMS is not None:
+            # Estadísticas separadas para consultas calientes y frías
+            params, cache_state = SEARCH_PARAMS.next_params()
+            self.client.get(
+                "/api/technicians/search",
+                params=params,
+                name=f"/api/technicians/search [{cache_state}]"
+            )
+            return
+        
         search_params = {
             "specialty": random.choice([
                 "Electricidad", "Plomería", "Carpintería"
@@ -130,7 +202,7 @@ class TechnicianUser(HttpUser):
     def on_start(self):
         """Login como técnico"""
         tech_data = {
-            "email": f"tech_{random.randint(1, 100)}@teknigo.com",
+            "email": f"tech_{random.randint(1, TECH_ACCOUNTS)}@teknigo.com",
             "password": "techpass123"
         }
         self.client.post("/api/auth/login", json=tech_data)
@@ -162,3 +234,6 @@ class LoadTestUser(TeknigoUser):
 
 # Comando para ejecutar:
 # locust -f locustfile.py --host=http://localhost:3000
+
+# Búsqueda automática de capacidad (knee finder):
+# python capacity_search.py --host=http://localhost:3000 --slo-p99=2000
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Benchmark Diferencial del Middleware de Next.js - Teknigo
+Mide el coste de src/middleware.ts por clase de ruta (estáticos, /api/*,
+/admin/*, páginas públicas) a tasas de llegada fijas, separándolo del coste
+de render. Cada clase se sondea con rutas emparejadas que se lanzan
+intercaladas bajo la misma carga:
+
+- baseline: /_next/static/... inexistente, excluido del matcher (404 sin middleware)
+- mw-only: ruta con "config." que el middleware corta con 403 antes de renderizar
+- page: la ruta real (middleware + render)
+- estáticos: /favicon.ico (excluido del matcher) vs /next.svg (pasa por el middleware)
+
+coste middleware ≈ mw-only - baseline; coste render ≈ page - mw-only
+
+Las llegadas son de lazo abierto: un horario compartido fija el instante de
+cada envío, responda o no el servidor a tiempo. Con --capacity se busca además
+la tasa máxima sostenible de cada clase con y sin middleware, por separado.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from locust import FastHttpUser, task, constant
+from locust.env import Environment
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../python-scripts'))
+from perf_baseline import RunRecorder, percentile, bootstrap_ci
+
+# (clase, variante, ruta, estado esperado)
+PROBES = [
+    ('baseline', 'no-mw', '/_next/static/mw-bench-404.js', 404),
+    ('static', 'no-mw', '/favicon.ico', 200),
+    ('static', 'mw', '/next.svg', 200),
+    ('public', 'mw-only', '/mw-bench/config.x', 403),
+    ('public', 'page', '/about', 200),
+    # /api/ y /admin además pagan el console.log síncrono del middleware
+    ('api', 'mw-only', '/api/mw-bench/config.x', 403),
+    # No hay rutas en /api: la "página" es el render de not-found
+    ('api', 'page', '/api/mw-bench', 404),
+    ('admin', 'mw-only', '/admin/mw-bench/config.x', 403),
+    ('admin', 'page', '/admin', 200)
+]
+# Usuarios = tasa x POOL_SECONDS: hay usuario libre para cada envío mientras la
+# latencia no supere POOL_SECONDS; si no, el envío sale tarde y se cuenta
+POOL_SECONDS = 2.0
+# Retraso a partir del cual un envío cuenta como tardío (ningún usuario libre a tiempo)
+LATE_TOLERANCE = 0.05
+
+
+def probe_name(route_class, variant):
+    return f"{route_class} [{variant}]"
+
+
+def median_difference_ci(a, b, iterations=500, max_samples=2000):
+    """Diferencia de medianas (a - b) con IC bootstrap del 95%"""
+    rng = random.Random(0)
+    a = a if len(a) <= max_samples else rng.sample(a, max_samples)
+    b = b if len(b) <= max_samples else rng.sample(b, max_samples)
+    difference = lambda x, y: percentile(x, 50) - percentile(y, 50)
+    return (difference(a, b), *bootstrap_ci([a, b], difference, iterations=iterations))
+
+
+class SendSchedule:
+    """Horario de envíos compartido por todos los usuarios (lazo abierto)
+
+    Cada envío toma el siguiente instante del horario, a 1/rate del anterior,
+    sin esperar a que respondan los anteriores: la tasa ofrecida no baja
+    cuando sube la latencia, como en un lazo cerrado.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.start(1.0)
+
+    def start(self, rate):
+        with self.lock:
+            self.interval = 1 / rate
+            self.next_at = time.time()
+            self.sent = 0
+            self.late = 0
+
+    def next_delay(self):
+        with self.lock:
+            at = self.next_at
+            self.next_at += self.interval
+            self.sent += 1
+            delay = at - time.time()
+            if delay < -LATE_TOLERANCE:
+                self.late += 1
+        return max(0.0, delay)
+
+    def late_fraction(self):
+        with self.lock:
+            return self.late / self.sent if self.sent else 0.0
+
+
+SCHEDULE = SendSchedule()
+
+
+class MiddlewareProbeUser(FastHttpUser):
+    """Recorre las sondas activas en turno rotativo para que todas vean la misma carga"""
+    # FastHttpUser: a cientos de RPS el cliente de requests satura el generador antes que el servidor
+    wait_time = constant(0)
+    # Sondas activas; MiddlewareBenchmark las cambia entre mediciones
+    probes = PROBES
+
+    def on_start(self):
+        self.next_probe = random.randrange(len(PROBES))
+
+    @task
+    def probe(self):
+        # Esperar al instante asignado por el horario (gevent: no bloquea a los demás usuarios)
+        time.sleep(SCHEDULE.next_delay())
+        probes = self.probes
+        route_class, variant, path, expected = probes[self.next_probe % len(probes)]
+        self.next_probe += 1
+        with self.client.get(path, name=probe_name(route_class, variant), catch_response=True) as response:
+            if response.status_code == expected:
+                response.success()
+            else:
+                response.failure(f"Estado {response.status_code}, esperado {expected}")
+
+
+class MiddlewareBenchmark:
+    def __init__(self, host="http://localhost:3000", warmup=20, duration=60, spawn_rate=100, slo_p99=500):
+        """Inicializar benchmark; cada tasa se mide duration segundos tras warmup
+
+        slo_p99 (ms) define una tasa sostenible en la búsqueda de capacidad.
+        """
+        self.warmup = warmup
+        self.duration = duration
+        self.spawn_rate = spawn_rate
+        self.slo_p99 = slo_p99
+        self.lock = threading.Lock()
+        self.results = []
+        self.capacity = {}
+        self.recorder = RunRecorder('middleware_bench')
+        self._scenario = None  # escenario de throughput de la tasa en medición (None en warm-up)
+        self._reset()
+
+        self.env = Environment(user_classes=[MiddlewareProbeUser], host=host)
+        self.env.events.request.add_listener(self._on_request)
+        self.runner = self.env.create_local_runner()
+
+    def _reset(self):
+        self._latencies = {probe_name(c, v): [] for c, v, _, _ in PROBES}
+        self._failures = dict.fromkeys(self._latencies, 0)
+
+    def _on_request(self, request_type, name, response_time, response_length, exception=None, **kwargs):
+        with self.lock:
+            if name not in self._latencies:
+                return
+            if exception is not None:
+                self._failures[name] += 1
+            else:
+                self._latencies[name].append(response_time)
+            scenario = self._scenario
+        if scenario is not None:
+            self.recorder.add_completions(scenario)
+
+    def _measure(self, rate, probes=PROBES, scenario=None):
+        """Ofrecer rate req/s en lazo abierto repartidos entre probes y medir tras el warm-up"""
+        users = max(1, math.ceil(rate * POOL_SECONDS))
+        MiddlewareProbeUser.probes = probes
+        SCHEDULE.start(rate)
+        self.runner.start(users, spawn_rate=self.spawn_rate)
+        time.sleep(users / self.spawn_rate + self.warmup)
+        SCHEDULE.start(rate)
+        with self.lock:
+            self._reset()
+            self._scenario = scenario
+        start_time = time.time()
+        time.sleep(self.duration)
+        with self.lock:
+            latencies, failures = self._latencies, self._failures
+            self._reset()
+            self._scenario = None
+        elapsed = time.time() - start_time
+        achieved = sum(len(v) + failures[k] for k, v in latencies.items()) / elapsed
+        return latencies, failures, achieved, SCHEDULE.late_fraction(), elapsed
+
+    def measure_rate(self, rate):
+        print(f"\n📶 Tasa objetivo: {rate:.0f} req/s ({max(1, math.ceil(rate * POOL_SECONDS))} usuarios)")
+        latencies, failures, achieved, late, elapsed = self._measure(rate, scenario=f"{rate:.0f}rps")
+        for name, values in latencies.items():
+            values.sort()
+            for millis in values:
+                self.recorder.add_latency(f"{rate:.0f}rps {name}", millis / 1000)
+
+        level = {'rate': rate, 'achieved_rps': achieved, 'late_sends': late, 'failures': failures, 'classes': {}}
+        baseline = latencies[probe_name('baseline', 'no-mw')]
+        for route_class in ('static', 'public', 'api', 'admin'):
+            if route_class == 'static':
+                with_mw, without_mw = latencies[probe_name('static', 'mw')], latencies[probe_name('static', 'no-mw')]
+                page = None
+            else:
+                with_mw, without_mw = latencies[probe_name(route_class, 'mw-only')], baseline
+                page = latencies[probe_name(route_class, 'page')]
+            if not with_mw or not without_mw:
+                continue
+            entry = {
+                'middleware_p50_ms': median_difference_ci(with_mw, without_mw),
+                'middleware_p99_ms': percentile(with_mw, 99) - percentile(without_mw, 99)
+            }
+            if page:
+                entry['render_p50_ms'] = median_difference_ci(page, with_mw)
+                entry['render_p99_ms'] = percentile(page, 99) - percentile(with_mw, 99)
+            level['classes'][route_class] = entry
+
+        # Envíos tardíos: no quedaban usuarios libres (latencia > POOL_SECONDS); el horario no se cumplió
+        level['saturated'] = late > 0.01 or achieved < rate * 0.9
+        self.results.append(level)
+        self._print_level(level)
+        return level
+
+    def _print_level(self, level):
+        flag = "  ⚠️ saturado" if level['saturated'] else ""
+        print(f"   📈 Real: {level['achieved_rps']:.1f} req/s, envíos tardíos {level['late_sends'] * 100:.1f}%{flag}")
+        print(f"   {'clase':<8} {'mw p50 (IC95%)':>26} {'mw Δp99':>9} {'render p50 (IC95%)':>28} {'render Δp99':>12}")
+        for route_class, entry in level['classes'].items():
+            mw, mw_low, mw_high = entry['middleware_p50_ms']
+            line = (f"   {route_class:<8} {mw:>8.2f}ms [{mw_low:>6.2f},{mw_high:>6.2f}] "
+                    f"{entry['middleware_p99_ms']:>7.1f}ms")
+            if 'render_p50_ms' in entry:
+                render, render_low, render_high = entry['render_p50_ms']
+                line += (f" {render:>9.1f}ms [{render_low:>7.1f},{render_high:>7.1f}] "
+                         f"{entry['render_p99_ms']:>10.1f}ms")
+            print(line)
+        failed = {name: count for name, count in level['failures'].items() if count}
+        if failed:
+            print(f"   ❌ Estados inesperados: {failed}")
+
+    def _sustains(self, rate, probe):
+        """¿Se sostiene rate req/s solo contra probe? Horario cumplido, sin fallos y p99 <= SLO"""
+        latencies, failures, achieved, late, _ = self._measure(rate, probes=[probe])
+        name = probe_name(probe[0], probe[1])
+        values = latencies[name]
+        p99 = percentile(values, 99) if values else math.inf
+        ok = (late <= 0.01 and achieved >= rate * 0.9
+              and failures[name] <= 0.01 * (len(values) + failures[name]) and p99 <= self.slo_p99)
+        print(f"   {name:<22} {rate:>7.0f} req/s -> {achieved:>7.1f} req/s, p99 {p99:>7.1f}ms, "
+              f"tardíos {late * 100:.1f}% {'✅' if ok else '❌'}")
+        return ok
+
+    def max_sustainable_rate(self, probe, start_rate, max_rate):
+        """Mayor tasa (duplicando desde start_rate) que probe sostiene en solitario"""
+        best, rate = 0.0, start_rate
+        while rate <= max_rate and self._sustains(rate, probe):
+            best, rate = rate, rate * 2
+        return best
+
+    def measure_capacity(self, start_rate, max_rate):
+        """Tasa máxima sostenible por clase con y sin middleware
+
+        Cada variante se carga sola, así que la diferencia es el rendimiento
+        que el middleware le quita a esa clase; la resolución es el factor 2
+        de la rampa.
+        """
+        print(f"\n🏁 Capacidad por clase (SLO p99 {self.slo_p99:.0f}ms, {start_rate:.0f}-{max_rate:.0f} req/s)")
+        probes = {(c, v): (c, v, path, expected) for c, v, path, expected in PROBES}
+        baseline = None
+        for route_class in ('static', 'public', 'api', 'admin'):
+            if route_class == 'static':
+                with_mw, without_mw = probes[('static', 'mw')], probes[('static', 'no-mw')]
+                no_mw_rate = self.max_sustainable_rate(without_mw, start_rate, max_rate)
+            else:
+                with_mw = probes[(route_class, 'mw-only')]
+                # La línea base sin middleware es común a las clases de página
+                if baseline is None:
+                    baseline = self.max_sustainable_rate(probes[('baseline', 'no-mw')], start_rate, max_rate)
+                no_mw_rate = baseline
+            mw_rate = self.max_sustainable_rate(with_mw, start_rate, max_rate)
+            self.capacity[route_class] = {
+                'mw_max_rps': mw_rate,
+                'no_mw_max_rps': no_mw_rate,
+                'throughput_cost': 1 - mw_rate / no_mw_rate if no_mw_rate else None
+            }
+        return self.capacity
+
+    def run(self, rates, capacity=None):
+        """Medir cada tasa y, con capacity=(start_rate, max_rate), buscar la capacidad por clase"""
+        print(f"🚀 Iniciando benchmark del middleware")
+        print(f"🎯 Tasas: {', '.join(f'{r:.0f}' for r in rates)} req/s | "
+              f"warm-up {self.warmup}s | medición {self.duration}s")
+        try:
+            for rate in rates:
+                self.measure_rate(rate)
+            if capacity:
+                self.measure_capacity(*capacity)
+        finally:
+            self.runner.quit()
+        self._print_trend()
+        if self.capacity:
+            self._print_capacity()
+        self.recorder.save()
+        return {'levels': self.results, 'capacity': self.capacity}
+
+    def _print_capacity(self):
+        print("\n" + "="*60)
+        print("🏁 TASA MÁXIMA SOSTENIBLE POR CLASE (con vs sin middleware)")
+        print("="*60)
+        print(f"{'clase':<8} {'con mw':>10} {'sin mw':>10} {'coste':>8}")
+        for route_class, entry in self.capacity.items():
+            cost = entry['throughput_cost']
+            cost = f"{cost * 100:>7.0f}%" if cost is not None else f"{'-':>8}"
+            print(f"{route_class:<8} {entry['mw_max_rps']:>6.0f}rps {entry['no_mw_max_rps']:>6.0f}rps {cost}")
+
+    def _print_trend(self):
+        print("\n" + "="*60)
+        print("📊 COSTE DEL MIDDLEWARE POR CLASE SEGÚN LA CARGA (Δp50)")
+        print("="*60)
+        classes = ('static', 'public', 'api', 'admin')
+        print(f"{'req/s':>8} " + " ".join(f"{c:>10}" for c in classes) + f" {'log (api-public)':>17}")
+        for level in self.results:
+            cells = []
+            for route_class in classes:
+                entry = level['classes'].get(route_class)
+                cells.append(f"{entry['middleware_p50_ms'][0]:>8.2f}ms" if entry else f"{'-':>10}")
+            public, api = level['classes'].get('public'), level['classes'].get('api')
+            # Misma ruta de middleware salvo el console.log: la diferencia aísla el log
+            log_cost = (f"{api['middleware_p50_ms'][0] - public['middleware_p50_ms'][0]:>15.2f}ms"
+                        if public and api else f"{'-':>17}")
+            print(f"{level['rate']:>8.0f} " + " ".join(cells) + f" {log_cost}")
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Benchmark diferencial de src/middleware.ts")
+    parser.add_argument('--host', default='http://localhost:3000')
+    parser.add_argument('--rates', type=float, nargs='+', default=[50, 100, 200, 400, 800],
+                        help="Tasas de llegada totales (req/s)")
+    parser.add_argument('--warmup', type=float, default=20, help="Segundos descartados por tasa")
+    parser.add_argument('--duration', type=float, default=60, help="Segundos de medición por tasa")
+    parser.add_argument('--capacity', action='store_true',
+                        help="Buscar la tasa máxima sostenible por clase con y sin middleware")
+    parser.add_argument('--capacity-start', type=float, default=25, help="Primera tasa de la rampa (req/s)")
+    parser.add_argument('--capacity-max', type=float, default=3200, help="Tasa máxima de la rampa (req/s)")
+    parser.add_argument('--slo-p99', type=float, default=500, help="p99 máximo (ms) de una tasa sostenible")
+    parser.add_argument('--output', help="Guardar el resultado en JSON")
+    args = parser.parse_args()
+
+    print("🧪 BENCHMARK DEL MIDDLEWARE - TEKNIGO")
+    print("="*50)
+    print("💡 Usar 'next build && next start': en dev la compilación bajo demanda domina las latencias")
+
+    benchmark = MiddlewareBenchmark(host=args.host, warmup=args.warmup, duration=args.duration,
+                                    slo_p99=args.slo_p99)
+    capacity = (args.capacity_start, args.capacity_max) if args.capacity else None
+    results = benchmark.run(sorted(args.rates), capacity=capacity)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Resultado guardado en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
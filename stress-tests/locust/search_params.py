@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Generador de Parámetros de Búsqueda con Control de Caché - Teknigo
+Construye un índice de combinaciones reales (especialidad, zona) a partir de
+los usuarios sembrados y genera flujos de consultas con una tasa objetivo de
+aciertos de caché, cardinalidad de claves y distribución de tamaños de resultado
+"""
+
+import os
+import sys
+import json
+import math
+import random
+import argparse
+import itertools
+import threading
+import collections
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../python-scripts'))
+
+INDEX_PATH = os.path.join(os.path.dirname(__file__), 'search_index.json')
+SIZE_DISTRIBUTIONS = ['uniform', 'large', 'small']
+
+
+def _count_combos(technicians):
+    """Contar técnicos por (especialidad, zona) a partir de dicts de usuario"""
+    counts = {}
+    for data in technicians:
+        for specialty in data.get('specialties', []):
+            for area in data.get('serviceAreas', []):
+                counts[(specialty, area)] = counts.get((specialty, area), 0) + 1
+    return counts
+
+
+def build_index_from_firestore(db):
+    """Leer solo los campos necesarios de los técnicos sembrados"""
+    query = (db.collection('users')
+             .where('userType', '==', 'technician')
+             .select(['specialties', 'serviceAreas']))
+    return _count_combos(doc.to_dict() for doc in query.stream())
+
+
+def build_index_from_snapshot(path):
+    """Construir el índice offline desde un snapshot de dataset_snapshot.py"""
+    from dataset_snapshot import SnapshotReader
+    snapshot = SnapshotReader(path)
+    return _count_combos(
+        data for _, data in snapshot.iter_docs('users')
+        if data.get('userType') == 'technician'
+    )
+
+
+def save_index(counts, path=INDEX_PATH):
+    combos = [
+        {'specialty': specialty, 'area': area, 'results': count}
+        for (specialty, area), count in sorted(counts.items())
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'combos': combos}, f, ensure_ascii=False, indent=2)
+    return combos
+
+
+def load_index(path=INDEX_PATH):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['combos']
+
+
+class SearchParamGenerator:
+    def __init__(self, combos, target_hit_ratio=0.8, key_cardinality=None,
+                 size_distribution='uniform', page_size=20, cache_keys=None, seed=None):
+        """Inicializar generador
+
+        Cada clave es una combinación real (especialidad, zona, página); las
+        páginas salen del tamaño real del resultado y el espacio se acota a
+        key_cardinality claves elegidas según size_distribution. Un "acierto"
+        repite una de las cache_keys claves pedidas más recientemente (_hot);
+        un "fallo" elige por peso una clave fuera de _hot, es decir, no pedida
+        en al menos cache_keys claves distintas. Con cache_keys por encima de
+        lo que la caché del servidor retiene (capacidad o TTL), esas claves ya
+        fueron desalojadas: lo frío se controla con la distancia de reutilización.
+        """
+        if size_distribution not in SIZE_DISTRIBUTIONS:
+            raise ValueError(f"Distribución desconocida: {size_distribution}")
+        self.target_hit_ratio = target_hit_ratio
+        self.page_size = page_size
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+        keys = []
+        weights = []
+        for combo in combos:
+            if combo['results'] <= 0:
+                continue
+            pages = math.ceil(combo['results'] / page_size)
+            for page in range(1, pages + 1):
+                keys.append((combo['specialty'], combo['area'], page))
+                if size_distribution == 'large':
+                    weights.append(combo['results'])
+                elif size_distribution == 'small':
+                    weights.append(1 / combo['results'])
+                else:
+                    weights.append(1)
+        if not keys:
+            raise ValueError("El índice de búsqueda está vacío; siembra técnicos primero")
+
+        # Semilla fija: todos los workers eligen el mismo working set y pueden repartírselo
+        cardinality = min(key_cardinality or len(keys), len(keys))
+        sampled = self._weighted_sample(random.Random(0 if seed is None else seed), keys, weights, cardinality)
+        self._weights = dict(zip(keys, weights))
+        self.cache_keys = cache_keys
+        self._set_working_set(sorted(sampled))
+
+    @staticmethod
+    def _weighted_sample(rng, keys, weights, k):
+        """Muestreo ponderado sin reemplazo (Efraimidis-Spirakis)"""
+        scored = sorted(
+            ((rng.random() ** (1 / w), key) for key, w in zip(keys, weights)),
+            reverse=True
+        )
+        return [key for _, key in scored[:k]]
+
+    def _set_working_set(self, keys, cache_keys=None):
+        self.working_set = keys
+        self._cum_weights = list(itertools.accumulate(self._weights[key] for key in keys))
+        if cache_keys is None:
+            cache_keys = self.cache_keys or len(keys) // 2
+        # Al menos una clave fuera de _hot: si no, no quedaría ninguna clave fría
+        self.hot_capacity = max(0, min(cache_keys, len(keys) - 1))
+        # Claves pedidas recientemente, de la más antigua a la más reciente
+        self._hot = collections.OrderedDict()
+
+    def partition(self, index, count):
+        """Quedarse con la parte index de count del working set (un worker de locust cada una)
+
+        Los workers no comparten claves, así que una clave fría en un worker no
+        la ha calentado otro; cada uno conserva su parte de cache_keys.
+        """
+        with self.lock:
+            cache_keys = (self.cache_keys or len(self.working_set) // 2) // count
+            self._set_working_set(self.working_set[index::count], cache_keys)
+
+    def _touch(self, key):
+        """Marcar la clave como recién pedida (llamar con el lock tomado)"""
+        self._hot[key] = None
+        self._hot.move_to_end(key)
+        if len(self._hot) > self.hot_capacity:
+            self._hot.popitem(last=False)
+        return key
+
+    def _cold_key(self):
+        """Clave elegida por peso entre las que no están en _hot"""
+        for _ in range(32):
+            key = self.rng.choices(self.working_set, cum_weights=self._cum_weights)[0]
+            if key not in self._hot:
+                return key
+        # _hot concentra casi todo el peso: elegir directamente entre el resto
+        cold = [key for key in self.working_set if key not in self._hot]
+        return self.rng.choices(cold, weights=[self._weights[key] for key in cold])[0]
+
+    def _as_params(self, key):
+        specialty, area, page = key
+        return {'specialty': specialty, 'area': area, 'page': page, 'pageSize': self.page_size}
+
+    def warmup_params(self):
+        """Las claves que empiezan calientes (hot_capacity, elegidas por peso), una vez cada una"""
+        with self.lock:
+            warm = self._weighted_sample(self.rng, self.working_set,
+                                         [self._weights[key] for key in self.working_set],
+                                         self.hot_capacity)
+            return [self._as_params(self._touch(key)) for key in warm]
+
+    def next_params(self):
+        """Devolver (params, 'warm'|'cold') para la siguiente consulta"""
+        with self.lock:
+            if self._hot and self.rng.random() < self.target_hit_ratio:
+                self.stats['hits'] += 1
+                hot = list(self._hot)
+                key = self.rng.choices(hot, weights=[self._weights[k] for k in hot])[0]
+                return self._as_params(self._touch(key)), 'warm'
+            self.stats['misses'] += 1
+            return self._as_params(self._touch(self._cold_key())), 'cold'
+
+    @property
+    def achieved_hit_ratio(self):
+        total = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / total if total else 0.0
+
+    def summary(self):
+        return dict(
+            self.stats,
+            working_set=len(self.working_set),
+            hot_keys=len(self._hot),
+            target_hit_ratio=self.target_hit_ratio,
+            achieved_hit_ratio=self.achieved_hit_ratio
+        )
+
+
+def generator_from_env():
+    """Generador compartido por proceso configurado por variables de entorno
+
+    Devuelve None si no hay índice (el locustfile usa entonces sus valores fijos).
+    """
+    path = os.environ.get('STRESS_SEARCH_INDEX', INDEX_PATH)
+    if not os.path.exists(path):
+        return None
+    cardinality = os.environ.get('STRESS_SEARCH_KEYS')
+    cache_keys = os.environ.get('STRESS_SEARCH_CACHE_KEYS')
+    return SearchParamGenerator(
+        load_index(path),
+        target_hit_ratio=float(os.environ.get('STRESS_SEARCH_HIT_RATIO', 0.8)),
+        key_cardinality=int(cardinality) if cardinality else None,
+        size_distribution=os.environ.get('STRESS_SEARCH_SIZES', 'uniform'),
+        cache_keys=int(cache_keys) if cache_keys else None
+    )
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Construir el índice de búsqueda de técnicos")
+    parser.add_argument('--snapshot', help="Construir desde un snapshot en lugar de Firestore")
+    parser.add_argument('--output', default=INDEX_PATH)
+    args = parser.parse_args()
+
+    print("🔍 ÍNDICE DE BÚSQUEDA DE TÉCNICOS - TEKNIGO")
+    print("="*50)
+
+    if args.snapshot:
+        counts = build_index_from_snapshot(args.snapshot)
+    else:
+        from database_loader import DatabaseLoader
+        counts = build_index_from_firestore(DatabaseLoader().db)
+
+    combos = save_index(counts, args.output)
+    sizes = [c['results'] for c in combos]
+    print(f"✅ {len(combos)} combinaciones (especialidad, zona) guardadas en {args.output}")
+    if sizes:
+        print(f"📏 Resultados por combinación: min={min(sizes)} máx={max(sizes)} "
+              f"prom={sum(sizes) / len(sizes):.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Punto de Entrada Unificado de Pruebas de Estrés - Teknigo
+Un solo comando con subcomandos: los harness (load, simulate, e2e), cuya
+configuración se resuelve como DEFAULT_CONFIG del script < archivo JSON
+(--config) < flags, y las herramientas (snapshot, teardown, provision,
+capacity, proxy, emulator, baseline), que reciben sus argumentos tal cual.
+Los módulos de cada subcomando (y con ellos firebase_admin, faker, selenium)
+solo se importan al ejecutarlo, así que --help arranca sin pagar esas
+importaciones
+"""
+
+import os
+import sys
+import argparse
+import importlib
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# subcomando -> (directorio, módulo); el módulo expone DEFAULT_CONFIG y run(config)
+SUBCOMMANDS = {
+    'load': ('python-scripts', 'database_loader'),
+    'simulate': ('python-scripts', 'data_simulator'),
+    'e2e': ('selenium', 'e2e_stress_test')
+}
+
+# subcomando -> (directorio, módulo, ayuda); el módulo expone main() con su propio argparse
+TOOLS = {
+    'snapshot': ('python-scripts', 'dataset_snapshot', "Generar/importar snapshots de datos"),
+    'teardown': ('python-scripts', 'teardown', "Borrar datos sintéticos por run_id"),
+    'provision': ('python-scripts', 'auth_provisioner', "Aprovisionar cuentas Auth para locust"),
+    'capacity': ('python-scripts', 'capacity_model', "Modelo de capacidad por teoría de colas"),
+    'proxy': ('python-scripts', 'impairment_proxy', "Proxy de degradación de red"),
+    'emulator': ('python-scripts', 'page_load_emulator', "Emulador HTTP de cargas de página"),
+    'baseline': ('python-scripts', 'perf_baseline', "Líneas base y detección de regresiones")
+}
+
+
+def build_parser():
+    # SUPPRESS: solo los flags indicados aparecen en el namespace y sobrescriben
+    common = argparse.ArgumentParser(add_help=False, argument_default=argparse.SUPPRESS)
+    common.add_argument('--config', help="Archivo JSON con una sección por subcomando")
+
+    parser = argparse.ArgumentParser(description="Pruebas de estrés de Teknigo")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    load = subparsers.add_parser('load', parents=[common], argument_default=argparse.SUPPRESS,
+                                 help="Carga masiva en Firestore (database_loader.py)")
+    load.add_argument('--users', dest='total_users', type=int, metavar='N')
+    load.add_argument('--services', dest='total_services', type=int, metavar='N')
+    load.add_argument('--users-per-batch', type=int, metavar='N')
+    load.add_argument('--services-per-batch', type=int, metavar='N')
+    load.add_argument('--history-months', type=int, metavar='N', help="> 0: carga histórica con estacionalidad")
+    load.add_argument('--visibility-sample-rate', type=float, metavar='FRAC',
+                      help="Fracción de docs verificados contra las queries de la app")
+    load.add_argument('--profile', action='store_true', help="Perfilar por muestreo")
+    load.add_argument('--profile-interval', type=float, metavar='SEG')
+
+    simulate = subparsers.add_parser('simulate', parents=[common], argument_default=argparse.SUPPRESS,
+                                     help="Simulación de carga sin Firebase (data_simulator.py)")
+    simulate.add_argument('--operations', dest='total_operations', type=int, metavar='N')
+    simulate.add_argument('--workers', dest='max_workers', type=int, metavar='N')
+    simulate.add_argument('--profile', action='store_true', help="Perfilar por muestreo")
+    simulate.add_argument('--profile-interval', type=float, metavar='SEG')
+
+    e2e = subparsers.add_parser('e2e', parents=[common], argument_default=argparse.SUPPRESS,
+                                help="Pruebas E2E con Selenium (e2e_stress_test.py)")
+    e2e.add_argument('--base-url')
+    e2e.add_argument('--users', dest='concurrent_users', type=int, metavar='N')
+    e2e.add_argument('--duration', dest='test_duration', type=int, metavar='N', help="Segundos")
+    e2e.add_argument('--headless', action=argparse.BooleanOptionalAction)
+    e2e.add_argument('--spill-dir', help="Registros binarios por resultado")
+    e2e.add_argument('--capture-dir', help="Registros de red CDP por petición")
+    e2e.add_argument('--block-resources', action='store_true',
+                     help="Bloquear imágenes/fuentes/analítica (modo throughput)")
+
+    # Solo para el listado de --help: main() despacha las herramientas antes de parsear
+    for name, (_, module_name, help_text) in TOOLS.items():
+        subparsers.add_parser(name, help=f"{help_text} ({module_name}.py)")
+    return parser
+
+
+def run_tool(command, tool_args):
+    """Ejecutar el main() de una herramienta con sus propios argumentos"""
+    directory, module_name, _ = TOOLS[command]
+    sys.path.insert(0, os.path.join(BASE_DIR, directory))
+    module = importlib.import_module(module_name)
+    sys.argv = [f"{os.path.basename(sys.argv[0])} {command}"] + tool_args
+    module.main()
+
+
+def load_config_file(path, command):
+    import json
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return data.get(command, {})
+
+
+def resolve_config(defaults, file_config, overrides):
+    unknown = sorted(set(file_config) - set(defaults))
+    if unknown:
+        raise ValueError(f"Claves desconocidas en la configuración: {', '.join(unknown)}")
+    return {**defaults, **file_config, **overrides}
+
+
+def main():
+    """Función principal"""
+    # Las herramientas parsean sus argumentos (incluido --help) con su propio argparse
+    if len(sys.argv) > 1 and sys.argv[1] in TOOLS:
+        run_tool(sys.argv[1], sys.argv[2:])
+        return
+
+    args = vars(build_parser().parse_args())
+    command = args.pop('command')
+    config_path = args.pop('config', None)
+
+    directory, module_name = SUBCOMMANDS[command]
+    sys.path.insert(0, os.path.join(BASE_DIR, directory))
+    module = importlib.import_module(module_name)
+
+    try:
+        file_config = load_config_file(config_path, command) if config_path else {}
+        config = resolve_config(module.DEFAULT_CONFIG, file_config, args)
+    except (OSError, ValueError) as e:
+        print(f"❌ Configuración inválida: {e}")
+        sys.exit(2)
+    module.run(config)
+
+
+if __name__ == "__main__":
+    main()
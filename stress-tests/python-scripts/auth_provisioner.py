@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Aprovisionamiento Masivo de Cuentas Auth - Teknigo
+Importa en lotes de 1000 las cuentas con las que inicia sesión el locustfile
+(user_N@test.com, tech_N@teknigo.com, admin@teknigo.com) y crea su perfil
+en Firestore con el mismo UID
+"""
+
+import sys
+import time
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from firebase_admin import auth
+
+from database_loader import DatabaseLoader
+
+AUTH_IMPORT_LIMIT = 1000
+FIRESTORE_BATCH_LIMIT = 500
+PBKDF2_ROUNDS = 1000
+
+# Deben coincidir con las credenciales del locustfile
+ACCOUNT_GROUPS = {
+    'client': {'email': 'user_{n}@test.com', 'uid': 'stress_user_{n}', 'password': 'password123'},
+    'technician': {'email': 'tech_{n}@teknigo.com', 'uid': 'stress_tech_{n}', 'password': 'techpass123'},
+    'admin': {'email': 'admin@teknigo.com', 'uid': 'stress_admin', 'password': 'adminpass123'}
+}
+
+
+class AuthProvisioner:
+    def __init__(self, loader, max_workers=8):
+        """Inicializar aprovisionamiento sobre una conexión de DatabaseLoader"""
+        self.loader = loader
+        self.max_workers = max_workers
+        self.hash_alg = auth.UserImportHash.pbkdf2_sha256(rounds=PBKDF2_ROUNDS)
+        self.stats = {
+            'auth_imported': 0,
+            'profiles_created': 0,
+            'auth_errors': 0
+        }
+        # Todas las cuentas de un grupo comparten contraseña; se hashea una sola
+        # vez por grupo (sal fija) para que 100k cuentas no cuesten 100k PBKDF2
+        self._hashes = {}
+        for user_type, group in ACCOUNT_GROUPS.items():
+            salt = f"teknigo-stress-{user_type}".encode()
+            password_hash = hashlib.pbkdf2_hmac(
+                'sha256', group['password'].encode(), salt, PBKDF2_ROUNDS
+            )
+            self._hashes[user_type] = (password_hash, salt)
+
+    def accounts(self, user_type, count):
+        """Generar (uid, email) deterministas para un grupo"""
+        group = ACCOUNT_GROUPS[user_type]
+        if user_type == 'admin':
+            return [(group['uid'], group['email'])]
+        return [
+            (group['uid'].format(n=n), group['email'].format(n=n))
+            for n in range(1, count + 1)
+        ]
+
+    def _import_auth_chunk(self, user_type, accounts):
+        password_hash, salt = self._hashes[user_type]
+        records = [
+            auth.ImportUserRecord(
+                uid=uid,
+                email=email,
+                email_verified=True,
+                display_name=name,
+                password_hash=password_hash,
+                password_salt=salt,
+                custom_claims={'userType': user_type, 'stressRunId': self.loader.run_id}
+            )
+            for uid, email, name in accounts
+        ]
+        result = auth.import_users(records, hash_alg=self.hash_alg)
+        for error in result.errors[:3]:
+            print(f"❌ Error importando {accounts[error.index][1]}: {error.reason}")
+        return result.success_count, result.failure_count
+
+    def _create_profile_chunk(self, user_type, accounts):
+        db = self.loader.db
+        batch = db.batch()
+        for uid, email, name in accounts:
+            profile = self.loader.generate_user_data(user_type)
+            profile['email'] = email
+            profile['displayName'] = name
+            batch.set(db.collection('users').document(uid), profile)
+        batch.commit()
+        return len(accounts)
+
+    def provision(self, clients=1000, technicians=100):
+        """Importar cuentas Auth y perfiles Firestore en paralelo"""
+        print(f"🚀 Iniciando aprovisionamiento de cuentas")
+        print(f"👥 Clientes: {clients} | 🔧 Técnicos: {technicians} | 👑 Admin: 1")
+        print(f"🏷️  Run ID: {self.loader.run_id}")
+
+        start_time = time.time()
+        # Un solo nombre por cuenta, compartido por Auth y el perfil de Firestore
+        groups = {
+            user_type: [(uid, email, self.loader.fake.name()) for uid, email in self.accounts(user_type, count)]
+            for user_type, count in (('client', clients), ('technician', technicians), ('admin', 1))
+        }
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            auth_futures = {}
+            profile_futures = []
+            for user_type, accounts in groups.items():
+                for i in range(0, len(accounts), AUTH_IMPORT_LIMIT):
+                    chunk = accounts[i:i + AUTH_IMPORT_LIMIT]
+                    auth_futures[executor.submit(self._import_auth_chunk, user_type, chunk)] = len(chunk)
+                for i in range(0, len(accounts), FIRESTORE_BATCH_LIMIT):
+                    profile_futures.append(executor.submit(
+                        self._create_profile_chunk, user_type, accounts[i:i + FIRESTORE_BATCH_LIMIT]
+                    ))
+
+            for future in as_completed(auth_futures):
+                try:
+                    success, failures = future.result()
+                    self.stats['auth_imported'] += success
+                    self.stats['auth_errors'] += failures
+                except Exception as e:
+                    self.stats['auth_errors'] += auth_futures[future]
+                    print(f"❌ Error en lote de Auth: {e}")
+
+            for future in as_completed(profile_futures):
+                try:
+                    self.stats['profiles_created'] += future.result()
+                except Exception as e:
+                    with self.loader.lock:
+                        self.loader.stats['errors'] += 1
+                    print(f"❌ Error en lote de perfiles: {e}")
+
+        elapsed = time.time() - start_time
+        expected = sum(len(a) for a in groups.values())
+
+        print("\n" + "="*50)
+        print("📊 RESUMEN DE APROVISIONAMIENTO")
+        print("="*50)
+        print(f"🔑 Cuentas Auth importadas: {self.stats['auth_imported']}/{expected}")
+        print(f"👤 Perfiles Firestore: {self.stats['profiles_created']}/{expected}")
+        print(f"❌ Errores Auth: {self.stats['auth_errors']}")
+        print(f"⏱️  Tiempo total: {elapsed:.2f} segundos")
+        print(f"📈 Velocidad: {self.stats['auth_imported'] / elapsed if elapsed > 0 else 0:.2f} cuentas/segundo")
+        return self.stats
+
+    def delete(self, clients=1000, technicians=100):
+        """Borrar las cuentas Auth aprovisionadas (los perfiles se borran con teardown.py)"""
+        uids = [uid for user_type, count in (('client', clients), ('technician', technicians), ('admin', 1))
+                for uid, _ in self.accounts(user_type, count)]
+        deleted = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(auth.delete_users, uids[i:i + AUTH_IMPORT_LIMIT])
+                for i in range(0, len(uids), AUTH_IMPORT_LIMIT)
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                deleted += result.success_count
+        print(f"🧹 Cuentas Auth borradas: {deleted}/{len(uids)}")
+        return deleted
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Aprovisionar cuentas Auth para locust")
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--technicians', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--delete', action='store_true', help="Borrar las cuentas en lugar de crearlas")
+    args = parser.parse_args()
+
+    print("🔥 APROVISIONAMIENTO DE CUENTAS PARA PRUEBAS DE ESTRÉS")
+    print("="*50)
+
+    try:
+        provisioner = AuthProvisioner(DatabaseLoader(), max_workers=args.workers)
+        if args.delete:
+            provisioner.delete(args.clients, args.technicians)
+            return
+        stats = provisioner.provision(args.clients, args.technicians)
+        if stats['auth_errors']:
+            sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Error durante el aprovisionamiento: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Modelo de Capacidad por Teoría de Colas - Teknigo
+Ajusta distribuciones de tiempo de servicio a partir de ejecuciones reales
+(archivos de perf_baseline.py), modela workers + Firestore como una red de
+colas y predice throughput y p99 para cantidades de workers y cargas no
+probadas. El modo sweep ejecuta database_loader.py a esas cantidades de
+workers y compara predicción y medición fase por fase
+"""
+
+import math
+import time
+import heapq
+import random
+import bisect
+import argparse
+
+from perf_baseline import load_run, histogram_percentile, percentile
+
+
+class UniformDistribution:
+    """Tiempo de servicio uniforme (los rangos fijos históricos del simulador)"""
+
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+        self.mean = (low + high) / 2
+
+    def sample(self, rng=random):
+        return rng.uniform(self.low, self.high)
+
+    def __repr__(self):
+        return f"U({self.low:.3f}s, {self.high:.3f}s)"
+
+
+class EmpiricalDistribution:
+    """Distribución empírica en segundos, muestreable con búsqueda binaria"""
+
+    def __init__(self, values, weights):
+        self.values = values
+        self.cumulative = []
+        total = 0
+        for weight in weights:
+            total += weight
+            self.cumulative.append(total)
+        self.total = total
+        self.mean = sum(v * w for v, w in zip(values, weights)) / total
+        variance = sum(w * (v - self.mean) ** 2 for v, w in zip(values, weights)) / total
+        # Coeficiente de variación al cuadrado: 1 = exponencial, 0 = determinista
+        self.scv = variance / self.mean ** 2 if self.mean else 0.0
+
+    @classmethod
+    def from_samples(cls, samples):
+        samples = sorted(samples)
+        return cls(samples, [1] * len(samples))
+
+    @classmethod
+    def from_histogram(cls, bins, hist_base):
+        """Desde un histograma logarítmico en ms (formato de perf_baseline.py)"""
+        ordered = sorted(bins)
+        values = [hist_base ** (i + 0.5) / 1000 for i in ordered]
+        return cls(values, [bins[i] for i in ordered])
+
+    def sample(self, rng=random):
+        index = bisect.bisect_left(self.cumulative, rng.random() * self.total)
+        return self.values[min(index, len(self.values) - 1)]
+
+    def __repr__(self):
+        return f"Empírica(media={self.mean * 1000:.1f}ms, scv={self.scv:.2f})"
+
+
+class BatchDistribution:
+    """Suma de n extracciones independientes: coste de generar un lote de n documentos"""
+
+    def __init__(self, per_item, n):
+        self.per_item = per_item
+        self.n = n
+        self.mean = per_item.mean * n
+
+    def sample(self, rng=random):
+        return sum(self.per_item.sample(rng) for _ in range(self.n))
+
+    def __repr__(self):
+        return f"{self.n} x {self.per_item}"
+
+
+def measure_generation_cost(samples=300):
+    """Medir el coste de CPU de generar un documento con Faker en esta máquina"""
+    from faker import Faker
+    fake = Faker('es_ES')
+    durations = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        {
+            'displayName': fake.name(),
+            'email': fake.email(),
+            'phone': fake.phone_number(),
+            'city': fake.city(),
+            'description': fake.text(max_nb_chars=100)
+        }
+        durations.append(time.perf_counter() - start)
+    return EmpiricalDistribution.from_samples(durations)
+
+
+class CapacityModel:
+    def __init__(self, cpu_time, io_times, io_servers=None, op_mix=None, docs_per_op=None):
+        """Red de colas: N workers -> CPU (1 servidor, por el GIL) -> Firestore
+
+        io_times es {tipo_operación: distribución}; cpu_time es una
+        distribución o {tipo_operación: distribución}. CPU y E/S deben medir
+        la misma unidad de operación (un documento o un lote entero);
+        docs_per_op convierte el throughput de operaciones a documentos.
+        io_servers=None modela Firestore como estación de retardo (sin cola),
+        un entero como c servidores FCFS compartidos.
+        """
+        self.cpu_times = cpu_time if isinstance(cpu_time, dict) else {op: cpu_time for op in io_times}
+        self.io_times = io_times
+        self.docs_per_op = docs_per_op or {op: 1 for op in io_times}
+        self.io_servers = io_servers
+        self.op_mix = op_mix or {op: 1 / len(io_times) for op in io_times}
+        self._ops = list(self.op_mix)
+        self._op_weights = [self.op_mix[op] for op in self._ops]
+
+    def _run(self, arrivals, workers, rng):
+        """Simulación de eventos discretos sobre una secuencia de llegadas ordenada"""
+        worker_free = [0.0] * workers
+        io_free = [0.0] * self.io_servers if self.io_servers else None
+        cpu_free = 0.0
+        starts = []
+        completions = []
+        for arrival in arrivals:
+            # Un worker libre toma la operación
+            start = max(arrival, heapq.heappop(worker_free))
+            op = rng.choices(self._ops, self._op_weights)[0]
+            # CPU FCFS de un servidor: el orden de salida respeta el de llegada
+            cpu_start = max(start, cpu_free)
+            cpu_free = cpu_start + self.cpu_times[op].sample(rng)
+            service = self.io_times[op].sample(rng)
+            if io_free is None:
+                done = cpu_free + service
+            else:
+                done = max(cpu_free, heapq.heappop(io_free)) + service
+                heapq.heappush(io_free, done)
+            heapq.heappush(worker_free, done)
+            starts.append(start)
+            completions.append(done)
+        return starts, completions
+
+    def _summarize(self, latencies, completions, warmup):
+        # Descartar el transitorio inicial
+        skip = int(len(latencies) * warmup)
+        latencies = latencies[skip:]
+        ordered = sorted(completions)[skip:]
+        elapsed = ordered[-1] - ordered[0] if len(ordered) > 1 else 0
+        throughput = (len(ordered) - 1) / elapsed if elapsed > 0 else 0.0
+        return {
+            'throughput': throughput,
+            'docs_per_second': throughput * self.mean_docs_per_op(),
+            'mean_latency': sum(latencies) / len(latencies),
+            'p99_latency': percentile(latencies, 99)
+        }
+
+    def predict_closed(self, workers, operations=20000, warmup=0.1, seed=0):
+        """Workers siempre ocupados (como run_load_simulation)"""
+        rng = random.Random(seed)
+        starts, completions = self._run([0.0] * operations, workers, rng)
+        latencies = [done - start for start, done in zip(starts, completions)]
+        return self._summarize(latencies, completions, warmup)
+
+    def predict_job(self, workers, operations):
+        """Un trabajo finito de operations operaciones encoladas a la vez (como load_data_parallel)
+
+        Sin descartar transitorios: el throughput es operations / makespan,
+        comparable con docs / duración de una fase del loader.
+        """
+        rng = random.Random(0)
+        starts, completions = self._run([0.0] * operations, workers, rng)
+        makespan = max(completions)
+        latencies = [done - start for start, done in zip(starts, completions)]
+        throughput = operations / makespan if makespan > 0 else 0.0
+        return {
+            'throughput': throughput,
+            'docs_per_second': throughput * self.mean_docs_per_op(),
+            'mean_latency': sum(latencies) / len(latencies),
+            'p99_latency': percentile(latencies, 99)
+        }
+
+    def for_op(self, op):
+        """Submodelo con un solo tipo de operación (una fase del loader)"""
+        return CapacityModel({op: self.cpu_times[op]}, {op: self.io_times[op]}, io_servers=self.io_servers,
+                             docs_per_op={op: self.docs_per_op[op]})
+
+    def predict_open(self, workers, rate, operations=20000, warmup=0.1, seed=0):
+        """Llegadas Poisson a rate ops/s; la latencia incluye la espera por un worker"""
+        rng = random.Random(seed)
+        arrivals = []
+        now = 0.0
+        for _ in range(operations):
+            now += rng.expovariate(rate)
+            arrivals.append(now)
+        _, completions = self._run(arrivals, workers, rng)
+        latencies = [done - arrival for arrival, done in zip(arrivals, completions)]
+        result = self._summarize(latencies, completions, warmup)
+        result['offered_rate'] = rate
+        return result
+
+    def mean_docs_per_op(self):
+        return sum(self.op_mix[op] * self.docs_per_op[op] for op in self._ops)
+
+    def bottleneck_capacity(self):
+        """Cota superior de throughput en ops/s (ley de utilización sobre la CPU y la E/S)"""
+        mean_io = sum(self.op_mix[op] * self.io_times[op].mean for op in self._ops)
+        mean_cpu = sum(self.op_mix[op] * self.cpu_times[op].mean for op in self._ops)
+        bounds = [1 / mean_cpu if mean_cpu else math.inf]
+        if self.io_servers:
+            bounds.append(self.io_servers / mean_io)
+        return min(bounds)
+
+
+def fit_model(run_paths, scenarios, io_servers=None, batch_sizes=None):
+    """Ajustar el modelo a partir de archivos de ejecución y escenarios dados
+
+    Los escenarios *_batch_commit miden un commit de lote entero, así que la
+    operación del modelo es un lote: la CPU es la generación de batch_sizes[op]
+    documentos y el throughput resultante está en lotes/s.
+    """
+    batch_sizes = batch_sizes or {op: 1 for op in scenarios}
+    bins_by_op = {}
+    hist_base = None
+    for path in run_paths:
+        run = load_run(path)
+        for op, scenario in scenarios.items():
+            data = run['scenarios'].get(scenario)
+            if not data or not data['bins']:
+                continue
+            hist_base = hist_base or data['hist_base']
+            merged = bins_by_op.setdefault(op, {})
+            for index, count in data['bins'].items():
+                merged[index] = merged.get(index, 0) + count
+    missing = [op for op in scenarios if op not in bins_by_op]
+    if missing:
+        raise ValueError(f"Sin mediciones para: {', '.join(scenarios[op] for op in missing)}")
+    io_times = {op: EmpiricalDistribution.from_histogram(bins, hist_base) for op, bins in bins_by_op.items()}
+    per_doc = measure_generation_cost()
+    cpu_times = {op: BatchDistribution(per_doc, batch_sizes[op]) for op in io_times}
+    return CapacityModel(cpu_times, io_times, io_servers=io_servers, docs_per_op=batch_sizes)
+
+
+# fase del loader -> escenario con la latencia del lote completo (generación + commit)
+LOADER_PHASES = {'user': 'users_batch', 'service': 'services_batch'}
+
+
+def sweep(model, worker_counts, batches=40):
+    """Ejecutar database_loader.py con cada cantidad de workers y comparar con las predicciones
+
+    Cada fase del loader (usuarios, luego servicios) es un trabajo finito de
+    lotes encolados a la vez, así que se compara con predict_job del
+    submodelo de esa fase: docs/s de la fase y p99 del lote completo, la
+    misma latencia que el modelo predice. Escribe documentos reales
+    etiquetados con el run_id de cada ejecución.
+    """
+    from database_loader import DatabaseLoader
+
+    rows = []
+    run_ids = []
+    for workers in worker_counts:
+        # Al menos 4 lotes por worker, para que la fase no sea solo arranque y cola
+        n = max(batches, 4 * workers)
+        loader = DatabaseLoader()
+        run_ids.append(loader.run_id)
+        stats = loader.load_data_parallel(
+            users_per_batch=model.docs_per_op['user'],
+            services_per_batch=model.docs_per_op['service'],
+            total_users=n * model.docs_per_op['user'],
+            total_services=n * model.docs_per_op['service'],
+            max_workers=workers,
+            save_run=False
+        )
+        for op, scenario in LOADER_PHASES.items():
+            phase = stats['phases'].get(op)
+            data = loader.recorder.scenarios.get(scenario)
+            if not phase or not phase['docs'] or not data or not data['bins']:
+                continue
+            predicted = model.for_op(op).predict_job(workers, phase['docs'] // model.docs_per_op[op])
+            rows.append({
+                'workers': workers,
+                'op': op,
+                'predicted_docs': predicted['docs_per_second'],
+                'measured_docs': phase['docs'] / phase['seconds'],
+                'predicted_p99': predicted['p99_latency'],
+                'measured_p99': histogram_percentile(data['bins'], data['hist_base'], 99) / 1000
+            })
+
+    print("\n" + "="*84)
+    print("📊 PREDICCIÓN vs database_loader.py (por fase, docs/s y p99 del lote completo)")
+    print("="*84)
+    print(f"{'workers':>8} {'fase':>8} {'docs/s pred':>12} {'medido':>9} {'Δ%':>7} "
+          f"{'p99 pred':>10} {'medido':>9} {'Δ%':>7}")
+    for row in rows:
+        x_error = (row['predicted_docs'] / row['measured_docs'] - 1) * 100 if row['measured_docs'] else 0
+        p99_error = (row['predicted_p99'] / row['measured_p99'] - 1) * 100 if row['measured_p99'] else 0
+        flag = "  ⚠️" if abs(x_error) > 15 or abs(p99_error) > 25 else ""
+        print(f"{row['workers']:>8} {row['op']:>8} {row['predicted_docs']:>12.1f} {row['measured_docs']:>9.1f} "
+              f"{x_error:>+7.1f} {row['predicted_p99']:>9.3f}s {row['measured_p99']:>8.3f}s {p99_error:>+7.1f}{flag}")
+    print("🧹 Limpieza: " + " && ".join(f"python teardown.py --run-id {run_id}" for run_id in run_ids))
+    return rows
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Modelo de capacidad calibrado con mediciones reales")
+    parser.add_argument('runs', nargs='*', help="Archivos de ejecución (reports/runs/*.json)")
+    parser.add_argument('--user-scenario', default='users_batch_commit')
+    parser.add_argument('--service-scenario', default='services_batch_commit')
+    parser.add_argument('--user-batch', type=int, default=25,
+                        help="Documentos por commit en el escenario de usuarios (users_per_batch)")
+    parser.add_argument('--service-batch', type=int, default=15,
+                        help="Documentos por commit en el escenario de servicios (services_per_batch)")
+    parser.add_argument('--io-servers', type=int, help="Concurrencia máxima de Firestore (por defecto ilimitada)")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument('--rate', type=float, nargs='*', default=[], help="Cargas abiertas (ops/s) a predecir")
+    parser.add_argument('--sweep', action='store_true',
+                        help="Ejecutar database_loader.py con cada --workers y comparar (escribe en Firestore)")
+    parser.add_argument('--sweep-batches', type=int, default=40, help="Lotes mínimos por fase en cada ejecución")
+    args = parser.parse_args()
+
+    print("🔮 MODELO DE CAPACIDAD - TEKNIGO")
+    print("="*50)
+
+    if args.runs:
+        model = fit_model(
+            args.runs,
+            {'user': args.user_scenario, 'service': args.service_scenario},
+            io_servers=args.io_servers,
+            batch_sizes={'user': args.user_batch, 'service': args.service_batch}
+        )
+        print("💡 Unidad de operación: un commit de lote (throughput en lotes/s)")
+    else:
+        print("💡 Sin archivos de ejecución: usando los rangos fijos del simulador")
+        model = CapacityModel(
+            measure_generation_cost(),
+            {'user': UniformDistribution(0.1, 0.3), 'service': UniformDistribution(0.05, 0.2)},
+            io_servers=args.io_servers
+        )
+
+    for op, dist in model.cpu_times.items():
+        print(f"🧮 CPU (generación, {op}): {dist}")
+    for op, dist in model.io_times.items():
+        print(f"🗄️  Firestore ({op}): {dist}")
+    print(f"🚧 Cota de throughput por cuello de botella: {model.bottleneck_capacity():.1f} ops/s")
+
+    print(f"\n{'workers':>8} {'ops/s':>10} {'docs/s':>10} {'latencia media':>15} {'p99':>10}")
+    for workers in args.workers:
+        result = model.predict_closed(workers)
+        print(f"{workers:>8} {result['throughput']:>10.1f} {result['docs_per_second']:>10.1f} "
+              f"{result['mean_latency']:>14.3f}s {result['p99_latency']:>9.3f}s")
+
+    for rate in args.rate:
+        for workers in args.workers:
+            result = model.predict_open(workers, rate)
+            print(f"📥 {rate:.0f} ops/s con {workers} workers: p99={result['p99_latency']:.3f}s "
+                  f"throughput={result['throughput']:.1f}/s")
+
+    if args.sweep:
+        if not args.runs:
+            parser.error("--sweep necesita archivos de ejecución para calibrar el modelo")
+        sweep(model, args.workers, args.sweep_batches)
+
+
+if __name__ == "__main__":
+    main()
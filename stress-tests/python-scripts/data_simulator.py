@@ -6,24 +6,38 @@ Simula pruebas de estrés sin necesidad de Firebase Admin SDK
 
 import time
 import random
-from faker import Faker
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
-import requests
-import json
-
-# Configurar Faker en español
-fake = Faker('es_ES')
+import argparse
+from resource_monitor import ResourceMonitor
+from perf_baseline import RunRecorder
+import sampling_profiler
+from sampling_profiler import phase
 
 class DataLoadSimulator:
-    def __init__(self):
-        """Inicializar simulador"""
+    def __init__(self, service_times=None):
+        """Inicializar simulador
+
+        service_times permite sustituir los rangos fijos por distribuciones
+        calibradas con mediciones reales ({'user': ..., 'service': ...}, ver
+        capacity_model.py).
+        """
         self.lock = threading.Lock()
         self.stats = {
             'operations_simulated': 0,
             'errors': 0,
             'total_time': 0
         }
+        self.recorder = RunRecorder('data_simulator')
+        # Importaciones diferidas: faker y capacity_model solo al crear el simulador
+        from faker import Faker
+        from capacity_model import UniformDistribution
+        self.fake = Faker('es_ES')
+        self.service_times = {
+            'user': UniformDistribution(0.1, 0.3),
+            'service': UniformDistribution(0.05, 0.2)
+        }
+        self.service_times.update(service_times or {})
         print("✅ Simulador de carga inicializado")
 
     def simulate_user_creation(self, count):
@@ -32,20 +46,25 @@ class DataLoadSimulator:
         
         try:
             for i in range(count):
+                op_start = time.time()
                 # Simular tiempo de creación de usuario
-                time.sleep(random.uniform(0.1, 0.3))
+                with phase('commit'):
+                    time.sleep(self.service_times['user'].sample())
                 
                 # Generar datos de usuario
-                user_data = {
-                    'displayName': fake.name(),
-                    'email': fake.email(),
-                    'userType': random.choice(['client', 'technician']),
-                    'phone': fake.phone_number(),
-                    'city': fake.city()
-                }
+                with phase('generate'):
+                    user_data = {
+                        'displayName': self.fake.name(),
+                        'email': self.fake.email(),
+                        'userType': random.choice(['client', 'technician']),
+                        'phone': self.fake.phone_number(),
+                        'city': self.fake.city()
+                    }
                 
+                self.recorder.add_latency('user_creation', time.time() - op_start)
                 with self.lock:
                     self.stats['operations_simulated'] += 1
+                self.recorder.add_completions('simulation')
             
             end_time = time.time()
             return count, end_time - start_time
@@ -61,22 +80,27 @@ class DataLoadSimulator:
         
         try:
             for i in range(count):
+                op_start = time.time()
                 # Simular tiempo de creación de servicio
-                time.sleep(random.uniform(0.05, 0.2))
+                with phase('commit'):
+                    time.sleep(self.service_times['service'].sample())
                 
                 # Generar datos de servicio
-                service_data = {
-                    'serviceType': random.choice([
-                        'Electricidad', 'Plomería', 'Carpintería', 
-                        'Pintura', 'Jardinería'
-                    ]),
-                    'description': fake.text(max_nb_chars=100),
-                    'budget': random.randint(50, 500),
-                    'urgent': random.choice([True, False])
-                }
+                with phase('generate'):
+                    service_data = {
+                        'serviceType': random.choice([
+                            'Electricidad', 'Plomería', 'Carpintería', 
+                            'Pintura', 'Jardinería'
+                        ]),
+                        'description': self.fake.text(max_nb_chars=100),
+                        'budget': random.randint(50, 500),
+                        'urgent': random.choice([True, False])
+                    }
                 
+                self.recorder.add_latency('service_creation', time.time() - op_start)
                 with self.lock:
                     self.stats['operations_simulated'] += 1
+                self.recorder.add_completions('simulation')
             
             end_time = time.time()
             return count, end_time - start_time
@@ -92,6 +116,7 @@ class DataLoadSimulator:
         print(f"📊 Operaciones a simular: {total_operations}")
         print(f"🔧 Workers concurrentes: {max_workers}")
         
+        monitor = ResourceMonitor('data_simulator').start()
         start_time = time.time()
         
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
@@ -123,6 +148,8 @@ class DataLoadSimulator:
         
         end_time = time.time()
         total_time = end_time - start_time
+        self.stats['total_time'] = total_time
+        monitor.stop()
         
         # Mostrar estadísticas
         print("\n" + "="*50)
@@ -139,19 +166,25 @@ class DataLoadSimulator:
             success_rate = ((self.stats['operations_simulated'] - self.stats['errors']) / self.stats['operations_simulated']) * 100
             print(f"✅ Tasa de éxito: {success_rate:.2f}%")
         
+        self.stats['generator'] = monitor.print_summary()
+        self.recorder.save()
         return self.stats
 
-def main():
-    """Función principal"""
+# Configuración por defecto (master_stress_test.py la sobrescribe con archivo/flags)
+DEFAULT_CONFIG = {
+    'total_operations': 500,    # Total de operaciones a simular
+    'max_workers': 8,           # Workers concurrentes
+    'profile': False,           # Perfilar por muestreo (sampling_profiler.py)
+    'profile_interval': 0.005
+}
+
+def run(config):
+    """Ejecutar la simulación con una configuración completa"""
     print("🔥 SIMULADOR DE CARGA DE DATOS - TEKNIGO")
     print("="*50)
     
-    # Configuración
-    config = {
-        'total_operations': 500,    # Total de operaciones a simular
-        'max_workers': 8,           # Workers concurrentes
-    }
-    
+    if config['profile']:
+        sampling_profiler.enable('data_simulator', config['profile_interval'])
     try:
         # Inicializar simulador
         simulator = DataLoadSimulator()
@@ -167,6 +200,17 @@ def main():
         
     except Exception as e:
         print(f"\n❌ Error durante la simulación: {e}")
+    finally:
+        sampling_profiler.disable()
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Simulación de carga sin Firebase")
+    parser.add_argument('--profile', action='store_true',
+                        help="Perfilar por muestreo (flamegraph + tiempo por fase)")
+    parser.add_argument('--profile-interval', type=float, default=0.005)
+    args = parser.parse_args()
+    run({**DEFAULT_CONFIG, 'profile': args.profile, 'profile_interval': args.profile_interval})
 
 if __name__ == "__main__":
     main()
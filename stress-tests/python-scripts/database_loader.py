@@ -8,21 +8,48 @@ import os
 import json
 import time
 import random
+import bisect
 from datetime import datetime, timedelta
-from faker import Faker
-import firebase_admin
-from firebase_admin import credentials, firestore
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
+import uuid
+import argparse
 from dotenv import load_dotenv
+from resource_monitor import ResourceMonitor
+from perf_baseline import RunRecorder
+import sampling_profiler
+from sampling_profiler import phase
 
-# Configurar Faker en español
-fake = Faker('es_ES')
+def server_timestamp():
+    """Centinela SERVER_TIMESTAMP; firebase_admin se importa solo al usarlo"""
+    from firebase_admin import firestore
+    return firestore.SERVER_TIMESTAMP
+
+# Campo con el que se etiqueta cada documento sintético (ver teardown.py)
+RUN_ID_FIELD = 'stressRunId'
+
+def new_run_id():
+    """Generar un ID de ejecución legible y único"""
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
 
 class DatabaseLoader:
-    def __init__(self, credentials_path=None):
-        """Inicializar conexión a Firebase"""
+    def __init__(self, credentials_path=None, connect=True, run_id=None, visibility_sample_rate=0.0):
+        """Inicializar conexión a Firebase
+
+        Con connect=False solo se usan los generadores de datos (sin red),
+        útil para construir snapshots offline. Todos los documentos generados
+        llevan el run_id para poder borrarlos después con teardown.py.
+        Con visibility_sample_rate > 0 una fracción de los documentos
+        confirmados se verifica contra las queries de la app (ver
+        visibility_sampler.py).
+        """
         self.db = None
+        self.visibility = None
+        self.run_id = run_id or new_run_id()
+        self.recorder = RunRecorder('database_loader')
+        # Importación diferida: faker carga todos sus proveedores al importarse
+        from faker import Faker
+        self.fake = Faker('es_ES')
         self.lock = threading.Lock()
         self.stats = {
             'users_created': 0,
@@ -33,8 +60,15 @@ class DatabaseLoader:
           # Cargar variables de entorno
         load_dotenv(os.path.join(os.path.dirname(__file__), '../../.env.local'))
         
+        if not connect:
+            return
+        
         # Inicializar Firebase Admin
         try:
+            # Importación diferida: firebase_admin tarda segundos en cargar
+            import firebase_admin
+            from firebase_admin import credentials, firestore
+            
             # Definir ruta de credenciales
             if credentials_path:
                 creds_path = credentials_path
@@ -56,27 +90,40 @@ class DatabaseLoader:
             
             self.db = firestore.client()
             print("✅ Conexión a Firebase establecida con credenciales de servicio")
+            if visibility_sample_rate > 0:
+                from visibility_sampler import VisibilitySampler
+                self.visibility = VisibilitySampler(self.db, visibility_sample_rate, self.recorder)
         except Exception as e:
             print(f"❌ Error conectando a Firebase: {e}")
             print("💡 Tip: Para pruebas de desarrollo, puedes usar el emulador de Firebase")
             print("   o configurar credenciales de servicio en Firebase Console")
             raise
 
-    def generate_user_data(self, user_type='client'):
-        """Generar datos de usuario aleatorios"""
+    def generate_user_data(self, user_type='client', created_at=None, now=None):
+        """Generar datos de usuario aleatorios
+
+        Con created_at se usan marcas de tiempo históricas en lugar de
+        SERVER_TIMESTAMP (ver load_history).
+        """
         user_data = {
-            'displayName': fake.name(),
-            'email': fake.email(),
+            'displayName': self.fake.name(),
+            'email': self.fake.email(),
             'userType': user_type,
-            'phone': fake.phone_number(),
-            'address': fake.address(),
-            'city': fake.city(),
-            'createdAt': firestore.SERVER_TIMESTAMP,
-            'lastLoginAt': firestore.SERVER_TIMESTAMP,
+            'phone': self.fake.phone_number(),
+            'address': self.fake.address(),
+            'city': self.fake.city(),
+            'createdAt': server_timestamp(),
+            'lastLoginAt': server_timestamp(),
             'isActive': True,
-            'profileComplete': random.choice([True, False])
+            'profileComplete': random.choice([True, False]),
+            RUN_ID_FIELD: self.run_id
         }
         
+        if created_at:
+            now = now or datetime.now(created_at.tzinfo)
+            user_data['createdAt'] = created_at
+            user_data['lastLoginAt'] = created_at + (now - created_at) * random.random()
+        
         # Datos específicos por tipo de usuario
         if user_type == 'technician':
             user_data.update({
@@ -97,8 +144,12 @@ class DatabaseLoader:
         
         return user_data
 
-    def generate_service_data(self, client_id, technician_id=None):
-        """Generar datos de servicio aleatorios"""
+    def generate_service_data(self, client_id, technician_id=None, created_at=None, now=None):
+        """Generar datos de servicio aleatorios
+
+        Con created_at el estado y las marcas de tiempo siguen un ciclo de vida
+        consistente (createdAt < acceptedAt < startedAt < completedAt).
+        """
         service_types = [
             'Electricidad', 'Plomería', 'Carpintería', 
             'Pintura', 'Jardinería', 'Cerrajería',
@@ -110,51 +161,75 @@ class DatabaseLoader:
         service_data = {
             'clientId': client_id,
             'serviceType': random.choice(service_types),
-            'description': fake.text(max_nb_chars=200),
-            'location': fake.address(),
+            'description': self.fake.text(max_nb_chars=200),
+            'location': self.fake.address(),
             'serviceArea': random.choice(['Centro', 'Norte', 'Sur', 'Este', 'Oeste']),
             'urgent': random.choice([True, False]),
             'budget': random.randint(50, 1000),
             'status': random.choice(statuses),
-            'createdAt': firestore.SERVER_TIMESTAMP,
-            'updatedAt': firestore.SERVER_TIMESTAMP
+            'createdAt': server_timestamp(),
+            'updatedAt': server_timestamp(),
+            RUN_ID_FIELD: self.run_id
         }
         
+        if created_at:
+            now = now or datetime.now(created_at.tzinfo)
+            from timeseries_generator import service_lifecycle
+            status, timestamps = service_lifecycle(created_at, now, has_technician=bool(technician_id))
+            service_data['status'] = status
+            service_data.update(timestamps)
+            # Solo los servicios ya aceptados tienen técnico asignado
+            if 'acceptedAt' in timestamps:
+                service_data['technicianId'] = technician_id
+            return service_data
+        
         if technician_id:
             service_data['technicianId'] = technician_id
-            service_data['acceptedAt'] = firestore.SERVER_TIMESTAMP
+            service_data['acceptedAt'] = server_timestamp()
         
         return service_data
 
-    def generate_review_data(self, service_id, client_id, technician_id):
+    def generate_review_data(self, service_id, client_id, technician_id, created_at=None):
         """Generar datos de reseña aleatorios"""
         return {
             'serviceId': service_id,
             'clientId': client_id,
             'technicianId': technician_id,
             'rating': random.randint(3, 5),
-            'comment': fake.text(max_nb_chars=150),
-            'createdAt': firestore.SERVER_TIMESTAMP
+            'comment': self.fake.text(max_nb_chars=150),
+            'createdAt': created_at or server_timestamp(),
+            RUN_ID_FIELD: self.run_id
         }
 
     def create_user_batch(self, user_type, count):
         """Crear lote de usuarios"""
+        batch_start = time.time()
         batch = self.db.batch()
         created_users = []
         
         try:
             for i in range(count):
                 user_ref = self.db.collection('users').document()
-                user_data = self.generate_user_data(user_type)
-                batch.set(user_ref, user_data)
-                created_users.append(user_ref.id)
+                with phase('generate'):
+                    user_data = self.generate_user_data(user_type)
+                with phase('batch'):
+                    batch.set(user_ref, user_data)
+                created_users.append((user_ref.id, user_data))
             
-            batch.commit()
+            commit_start = time.time()
+            with phase('commit'):
+                batch.commit()
+            self.recorder.add_latency('users_batch_commit', time.time() - commit_start)
+            # Lote completo (generación + commit): la operación de capacity_model.py
+            self.recorder.add_latency('users_batch', time.time() - batch_start)
+            if self.visibility:
+                self.visibility.observe('users', created_users)
             
             with self.lock:
                 self.stats['users_created'] += count
+            self.recorder.add_completions('load', count)
             
-            return created_users
+            return [user_id for user_id, _ in created_users]
         except Exception as e:
             with self.lock:
                 self.stats['errors'] += 1
@@ -163,6 +238,7 @@ class DatabaseLoader:
 
     def create_service_batch(self, client_ids, technician_ids, count):
         """Crear lote de servicios"""
+        batch_start = time.time()
         batch = self.db.batch()
         created_services = []
         
@@ -172,32 +248,49 @@ class DatabaseLoader:
                 client_id = random.choice(client_ids)
                 technician_id = random.choice(technician_ids) if random.random() > 0.3 else None
                 
-                service_data = self.generate_service_data(client_id, technician_id)
-                batch.set(service_ref, service_data)
-                created_services.append(service_ref.id)
+                with phase('generate'):
+                    service_data = self.generate_service_data(client_id, technician_id)
+                with phase('batch'):
+                    batch.set(service_ref, service_data)
+                created_services.append((service_ref.id, service_data))
             
-            batch.commit()
+            commit_start = time.time()
+            with phase('commit'):
+                batch.commit()
+            self.recorder.add_latency('services_batch_commit', time.time() - commit_start)
+            self.recorder.add_latency('services_batch', time.time() - batch_start)
+            if self.visibility:
+                self.visibility.observe('services', created_services)
             
             with self.lock:
                 self.stats['services_created'] += count
+            self.recorder.add_completions('load', count)
                 
-            return created_services
+            return [service_id for service_id, _ in created_services]
         except Exception as e:
             with self.lock:
                 self.stats['errors'] += 1
             print(f"❌ Error creando lote de servicios: {e}")
             return []
 
-    def load_data_parallel(self, users_per_batch=50, services_per_batch=30, total_users=1000, total_services=500):
-        """Cargar datos en paralelo"""
+    def load_data_parallel(self, users_per_batch=50, services_per_batch=30, total_users=1000, total_services=500,
+                           max_workers=None, save_run=True):
+        """Cargar datos en paralelo
+
+        max_workers fija los workers de ambas fases (por defecto 5 para
+        usuarios y 3 para servicios). La duración de cada fase queda en
+        stats['phases'] para compararla con capacity_model.py.
+        """
         print(f"🚀 Iniciando carga masiva de datos...")
+        print(f"🏷️  Run ID: {self.run_id}")
         print(f"👥 Usuarios a crear: {total_users}")
         print(f"🔧 Servicios a crear: {total_services}")
         
+        monitor = ResourceMonitor('database_loader').start()
         start_time = time.time()
         
         # Crear usuarios en paralelo
-        with ThreadPoolExecutor(max_workers=5) as executor:
+        with ThreadPoolExecutor(max_workers=max_workers or 5) as executor:
             # 70% clientes, 30% técnicos
             client_batches = total_users * 7 // 10 // users_per_batch
             tech_batches = total_users * 3 // 10 // users_per_batch
@@ -228,13 +321,15 @@ class DatabaseLoader:
                     print(f"✅ Lote de {user_type}s creado: {len(user_ids)} usuarios")
                 except Exception as e:
                     print(f"❌ Error en lote de {user_type}s: {e}")
+        self.stats['phases'] = {'user': {'docs': self.stats['users_created'], 'seconds': time.time() - start_time}}
         
         # Crear servicios después de tener usuarios
         if client_ids and technician_ids:
             print("🔧 Creando servicios...")
             service_batches = total_services // services_per_batch
+            services_start = time.time()
             
-            with ThreadPoolExecutor(max_workers=3) as executor:
+            with ThreadPoolExecutor(max_workers=max_workers or 3) as executor:
                 service_futures = []
                 
                 for i in range(service_batches):
@@ -252,8 +347,11 @@ class DatabaseLoader:
                         print(f"✅ Lote de servicios creado: {len(service_ids)} servicios")
                     except Exception as e:
                         print(f"❌ Error en lote de servicios: {e}")
+            self.stats['phases']['service'] = {'docs': self.stats['services_created'],
+                                               'seconds': time.time() - services_start}
         
         end_time = time.time()
+        monitor.stop()
         
         # Mostrar estadísticas
         print("\n" + "="*50)
@@ -264,36 +362,195 @@ class DatabaseLoader:
         print(f"❌ Errores: {self.stats['errors']}")
         print(f"⏱️  Tiempo total: {end_time - start_time:.2f} segundos")
         print(f"📈 Velocidad: {(self.stats['users_created'] + self.stats['services_created']) / (end_time - start_time):.2f} docs/segundo")
+        print(f"🧹 Limpieza: python teardown.py --run-id {self.run_id}")
+        self.stats['generator'] = monitor.print_summary()
+        self._finish_visibility()
+        if save_run:
+            self.recorder.save()
+        return self.stats
 
-def main():
-    """Función principal"""
+    def _finish_visibility(self):
+        """Esperar a las verificaciones pendientes para incluirlas en la ejecución guardada"""
+        if self.visibility:
+            print("👁️  Esperando verificaciones de visibilidad pendientes...")
+            self.visibility.drain()
+            self.stats['visibility'] = self.visibility.print_summary()
+
+    def _commit_docs(self, collection, docs):
+        """Commit de un lote de (id, data) ya generados"""
+        try:
+            batch = self.db.batch()
+            with phase('batch'):
+                for doc_id, data in docs:
+                    batch.set(self.db.collection(collection).document(doc_id), data)
+            commit_start = time.time()
+            with phase('commit'):
+                batch.commit()
+            self.recorder.add_latency(f'{collection}_batch_commit', time.time() - commit_start)
+            if self.visibility:
+                self.visibility.observe(collection, docs)
+            with self.lock:
+                self.stats[f'{collection}_created'] += len(docs)
+            self.recorder.add_completions('history_load', len(docs))
+        except Exception as e:
+            with self.lock:
+                self.stats['errors'] += 1
+            print(f"❌ Error creando lote de {collection}: {e}")
+
+    def load_history(self, months=6, total_users=1000, total_services=5000, batch_size=500, max_workers=5):
+        """Cargar datos históricos con estacionalidad, generados en orden cronológico
+
+        Usuarios y servicios se generan como flujos temporales y se envían en
+        lotes a medida que se producen; cada servicio usa un cliente creado
+        antes que él.
+        """
+        # numpy solo hace falta para la carga histórica
+        from timeseries_generator import TimeSeriesGenerator, history_window
+        start, now = history_window(months)
+        print(f"🚀 Iniciando carga histórica de {months} meses ({start:%Y-%m-%d} a {now:%Y-%m-%d})")
+        print(f"🏷️  Run ID: {self.run_id}")
+        
+        monitor = ResourceMonitor('database_loader').start()
+        start_time = time.time()
+        in_flight = threading.BoundedSemaphore(max_workers * 2)
+        
+        def submit(executor, collection, docs):
+            # Esperar aquí significa que los commits no dan abasto con la generación
+            with phase('backpressure'):
+                in_flight.acquire()
+            future = executor.submit(self._commit_docs, collection, docs)
+            future.add_done_callback(lambda f: in_flight.release())
+        
+        client_times, client_ids, technician_times, technician_ids = [], [], [], []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Usuarios: las altas crecen con el tiempo (growth) como la plataforma
+            pending = []
+            users = TimeSeriesGenerator(start, now, growth=1.0).iter_times(total_users)
+            for created_at in users:
+                user_type = 'technician' if random.random() < 0.3 else 'client'
+                user_ref = self.db.collection('users').document()
+                with phase('generate'):
+                    pending.append((user_ref.id, self.generate_user_data(user_type, created_at, now)))
+                if user_type == 'client':
+                    client_times.append(created_at)
+                    client_ids.append(user_ref.id)
+                else:
+                    technician_times.append(created_at)
+                    technician_ids.append(user_ref.id)
+                if len(pending) >= batch_size:
+                    submit(executor, 'users', pending)
+                    pending = []
+            if pending:
+                submit(executor, 'users', pending)
+            
+            if not client_ids or not technician_ids:
+                print("❌ No hay clientes y técnicos suficientes para generar servicios")
+            else:
+                pending = []
+                reviews = []
+                services = TimeSeriesGenerator(start, now).iter_times(total_services)
+                for created_at in services:
+                    # Clientes dados de alta antes del servicio (o el primero si aún no hay)
+                    eligible = max(1, bisect.bisect_right(client_times, created_at))
+                    client_id = client_ids[random.randrange(eligible)]
+                    # Técnicos dados de alta antes del servicio: acceptedAt nunca precede
+                    # al alta del técnico; sin ninguno todavía, el servicio queda sin asignar
+                    eligible = bisect.bisect_right(technician_times, created_at)
+                    technician_id = technician_ids[random.randrange(eligible)] if eligible else None
+                    service_ref = self.db.collection('services').document()
+                    with phase('generate'):
+                        service_data = self.generate_service_data(client_id, technician_id, created_at, now)
+                    pending.append((service_ref.id, service_data))
+                    
+                    if service_data['status'] == 'completed' and random.random() < 0.6:
+                        review_at = service_data['completedAt'] + timedelta(hours=random.expovariate(1 / 24))
+                        if review_at <= now:
+                            reviews.append((
+                                self.db.collection('reviews').document().id,
+                                self.generate_review_data(service_ref.id, client_id, technician_id, review_at)
+                            ))
+                    if len(pending) >= batch_size:
+                        submit(executor, 'services', pending)
+                        pending = []
+                    if len(reviews) >= batch_size:
+                        submit(executor, 'reviews', reviews)
+                        reviews = []
+                if pending:
+                    submit(executor, 'services', pending)
+                if reviews:
+                    submit(executor, 'reviews', reviews)
+        
+        end_time = time.time()
+        monitor.stop()
+        
+        print("\n" + "="*50)
+        print("📊 RESUMEN DE CARGA HISTÓRICA")
+        print("="*50)
+        print(f"👥 Usuarios creados: {self.stats['users_created']}")
+        print(f"🔧 Servicios creados: {self.stats['services_created']}")
+        print(f"⭐ Reseñas creadas: {self.stats['reviews_created']}")
+        print(f"❌ Errores: {self.stats['errors']}")
+        print(f"⏱️  Tiempo total: {end_time - start_time:.2f} segundos")
+        total_docs = self.stats['users_created'] + self.stats['services_created'] + self.stats['reviews_created']
+        print(f"📈 Velocidad: {total_docs / (end_time - start_time):.2f} docs/segundo")
+        print(f"🧹 Limpieza: python teardown.py --run-id {self.run_id}")
+        self.stats['generator'] = monitor.print_summary()
+        self._finish_visibility()
+        self.recorder.save()
+
+# Configuración por defecto (master_stress_test.py la sobrescribe con archivo/flags)
+DEFAULT_CONFIG = {
+    'total_users': 500,       # Total de usuarios a crear
+    'total_services': 300,    # Total de servicios a crear
+    'users_per_batch': 25,    # Usuarios por lote
+    'services_per_batch': 15, # Servicios por lote
+    'history_months': 0,      # > 0: carga histórica con estacionalidad (load_history)
+    'visibility_sample_rate': 0.0,  # Fracción de docs verificados contra las queries de la app
+    'profile': False,         # Perfilar por muestreo (sampling_profiler.py)
+    'profile_interval': 0.005
+}
+
+def run(config):
+    """Ejecutar la carga con una configuración completa"""
     print("🔥 GENERADOR DE DATOS PARA PRUEBAS DE ESTRÉS")
     print("="*50)
     
-    # Configuración
-    config = {
-        'total_users': 500,      # Total de usuarios a crear
-        'total_services': 300,   # Total de servicios a crear
-        'users_per_batch': 25,   # Usuarios por lote
-        'services_per_batch': 15 # Servicios por lote
-    }
-    
+    if config['profile']:
+        sampling_profiler.enable('database_loader', config['profile_interval'])
     try:
         # Inicializar generador
-        loader = DatabaseLoader()
+        loader = DatabaseLoader(visibility_sample_rate=config['visibility_sample_rate'])
         
         # Cargar datos
-        loader.load_data_parallel(
-            users_per_batch=config['users_per_batch'],
-            services_per_batch=config['services_per_batch'],
-            total_users=config['total_users'],
-            total_services=config['total_services']
-        )
+        if config['history_months'] > 0:
+            loader.load_history(
+                months=config['history_months'],
+                total_users=config['total_users'],
+                total_services=config['total_services']
+            )
+        else:
+            loader.load_data_parallel(
+                users_per_batch=config['users_per_batch'],
+                services_per_batch=config['services_per_batch'],
+                total_users=config['total_users'],
+                total_services=config['total_services']
+            )
         
         print("\n✅ Carga de datos completada exitosamente!")
         
     except Exception as e:
         print(f"\n❌ Error durante la carga: {e}")
+    finally:
+        sampling_profiler.disable()
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Carga masiva de datos de prueba en Firestore")
+    parser.add_argument('--profile', action='store_true',
+                        help="Perfilar por muestreo (flamegraph + tiempo por fase)")
+    parser.add_argument('--profile-interval', type=float, default=0.005)
+    args = parser.parse_args()
+    run({**DEFAULT_CONFIG, 'profile': args.profile, 'profile_interval': args.profile_interval})
 
 if __name__ == "__main__":
     main()
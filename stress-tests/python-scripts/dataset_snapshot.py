@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Snapshots de Datos Offline - Teknigo
+Genera un dataset una sola vez (NDJSON + zstd, en chunks) y lo importa
+muchas veces en Firestore/emulador sin volver a pasar por Faker
+"""
+
+import os
+import io
+import sys
+import json
+import mmap
+import time
+import random
+import shutil
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import zstandard
+
+from database_loader import DatabaseLoader, RUN_ID_FIELD, server_timestamp
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), '../snapshots')
+FORMAT_VERSION = 1
+COLLECTIONS = ['users', 'services', 'reviews']
+FIRESTORE_BATCH_LIMIT = 500
+_ID_ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
+
+
+def snapshot_path(seed, total_users, total_services, base_dir=SNAPSHOT_DIR):
+    """Ruta del snapshot para una combinación de semilla y tamaño"""
+    return os.path.join(base_dir, f"seed{seed}_u{total_users}_s{total_services}")
+
+
+def _encode_value(value):
+    """Serializar valores que JSON no soporta (timestamps de Firestore)"""
+    if value is server_timestamp():
+        return {'$ts': 'server'}
+    if isinstance(value, datetime):
+        return {'$ts': value.isoformat()}
+    raise TypeError(f"Tipo no serializable en snapshot: {type(value).__name__}")
+
+
+def _decode_object(obj):
+    """Restaurar timestamps codificados por _encode_value"""
+    if len(obj) == 1 and '$ts' in obj:
+        if obj['$ts'] == 'server':
+            return server_timestamp()
+        return datetime.fromisoformat(obj['$ts'])
+    return obj
+
+
+class _ChunkWriter:
+    """Escribe documentos de una colección en chunks NDJSON comprimidos"""
+
+    def __init__(self, directory, collection, chunk_size, level=3):
+        self.directory = directory
+        self.collection = collection
+        self.chunk_size = chunk_size
+        self.compressor = zstandard.ZstdCompressor(level=level)
+        self.chunks = []
+        self.count = 0
+        self._file = None
+        self._stream = None
+        self._in_chunk = 0
+
+    def _rotate(self):
+        self._close_chunk()
+        name = f"{self.collection}-{len(self.chunks):05d}.ndjson.zst"
+        self._file = open(os.path.join(self.directory, name), 'wb')
+        self._stream = self.compressor.stream_writer(self._file)
+        self.chunks.append({'file': name, 'docs': 0})
+        self._in_chunk = 0
+
+    def _close_chunk(self):
+        if self._stream is not None:
+            self.chunks[-1]['docs'] = self._in_chunk
+            self._stream.close()
+            self._file = None
+            self._stream = None
+
+    def write(self, doc_id, data):
+        if self._stream is None or self._in_chunk >= self.chunk_size:
+            self._rotate()
+        line = json.dumps(
+            {'id': doc_id, 'data': data},
+            ensure_ascii=False,
+            separators=(',', ':'),
+            default=_encode_value
+        )
+        self._stream.write(line.encode('utf-8') + b'\n')
+        self._in_chunk += 1
+        self.count += 1
+
+    def close(self):
+        self._close_chunk()
+        return {'docs': self.count, 'chunks': self.chunks}
+
+
+class SnapshotWriter:
+    def __init__(self, base_dir=SNAPSHOT_DIR, chunk_size=10000):
+        """Inicializar generador de snapshots (no requiere conexión a Firebase)"""
+        self.base_dir = base_dir
+        self.chunk_size = chunk_size
+        self.loader = DatabaseLoader(connect=False)
+
+    def _doc_id(self, rng):
+        """ID de 20 caracteres con el mismo formato que Firestore"""
+        return ''.join(rng.choices(_ID_ALPHABET, k=20))
+
+    def generate(self, seed, total_users=1000, total_services=500, force=False):
+        """Generar el snapshot si no existe en caché y devolver su ruta"""
+        path = snapshot_path(seed, total_users, total_services, self.base_dir)
+        manifest_path = os.path.join(path, 'manifest.json')
+        if os.path.exists(manifest_path) and not force:
+            print(f"♻️  Snapshot en caché: {path}")
+            return path
+
+        # Se genera en un directorio temporal y se renombra al terminar: una
+        # generación interrumpida (también con --force) nunca deja un
+        # manifiesto junto a chunks mezclados o truncados
+        final_path = path
+        path = f"{final_path}.tmp-{os.getpid()}"
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        print(f"🧬 Generando snapshot seed={seed} usuarios={total_users} servicios={total_services}")
+        start_time = time.time()
+
+        # Semillas fijas: mismo seed + tamaño => mismo dataset
+        random.seed(seed)
+        from faker import Faker
+        Faker.seed(seed)
+        id_rng = random.Random(seed)
+
+        writers = {c: _ChunkWriter(path, c, self.chunk_size) for c in COLLECTIONS}
+        client_ids = []
+        technician_ids = []
+
+        # 70% clientes, 30% técnicos (misma proporción que load_data_parallel)
+        total_clients = total_users * 7 // 10
+        for i in range(total_users):
+            user_type = 'client' if i < total_clients else 'technician'
+            doc_id = self._doc_id(id_rng)
+            writers['users'].write(doc_id, self.loader.generate_user_data(user_type))
+            (client_ids if user_type == 'client' else technician_ids).append(doc_id)
+
+        if client_ids and technician_ids:
+            for i in range(total_services):
+                client_id = random.choice(client_ids)
+                technician_id = random.choice(technician_ids) if random.random() > 0.3 else None
+                service_id = self._doc_id(id_rng)
+                service_data = self.loader.generate_service_data(client_id, technician_id)
+                writers['services'].write(service_id, service_data)
+
+                # Solo los servicios completados con técnico reciben reseña
+                if technician_id and service_data['status'] == 'completed':
+                    writers['reviews'].write(
+                        self._doc_id(id_rng),
+                        self.loader.generate_review_data(service_id, client_id, technician_id)
+                    )
+
+        manifest = {
+            'version': FORMAT_VERSION,
+            'seed': seed,
+            'total_users': total_users,
+            'total_services': total_services,
+            'created': datetime.now().isoformat(),
+            'collections': {c: w.close() for c, w in writers.items()}
+        }
+        # El manifiesto se escribe al final: su presencia marca un snapshot completo
+        with open(os.path.join(path, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        shutil.rmtree(final_path, ignore_errors=True)
+        os.replace(path, final_path)
+        path = final_path
+
+        elapsed = time.time() - start_time
+        total_docs = sum(c['docs'] for c in manifest['collections'].values())
+        print(f"✅ Snapshot generado: {total_docs} docs en {elapsed:.2f}s ({path})")
+        return path
+
+
+class SnapshotReader:
+    def __init__(self, path):
+        """Abrir un snapshot existente a partir de su manifiesto"""
+        self.path = path
+        with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Versión de snapshot no soportada: {self.manifest.get('version')}")
+
+    def count(self, collection):
+        return self.manifest['collections'].get(collection, {}).get('docs', 0)
+
+    def iter_docs(self, collection):
+        """Iterar (id, data) de una colección leyendo los chunks vía mmap"""
+        decompressor = zstandard.ZstdDecompressor()
+        for chunk in self.manifest['collections'].get(collection, {}).get('chunks', []):
+            chunk_path = os.path.join(self.path, chunk['file'])
+            with open(chunk_path, 'rb') as fh, \
+                    mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                reader = io.BufferedReader(decompressor.stream_reader(mm), buffer_size=1 << 20)
+                for line in reader:
+                    record = json.loads(line, object_hook=_decode_object)
+                    yield record['id'], record['data']
+
+
+def import_snapshot(loader, path, batch_size=FIRESTORE_BATCH_LIMIT, max_workers=8):
+    """Importar un snapshot con commits por lotes en paralelo"""
+    snapshot = SnapshotReader(path)
+    batch_size = min(batch_size, FIRESTORE_BATCH_LIMIT)
+    # Limitar lotes en vuelo para que la memoria no crezca con el tamaño del snapshot
+    in_flight = threading.BoundedSemaphore(max_workers * 2)
+
+    print(f"📥 Importando snapshot: {path}")
+    print(f"🏷️  Run ID: {loader.run_id}")
+    start_time = time.time()
+
+    def commit_batch(collection, docs):
+        try:
+            batch = loader.db.batch()
+            for doc_id, data in docs:
+                # La etiqueta corresponde a la importación, no a la generación
+                data[RUN_ID_FIELD] = loader.run_id
+                batch.set(loader.db.collection(collection).document(doc_id), data)
+            batch.commit()
+            with loader.lock:
+                loader.stats[f'{collection}_created'] += len(docs)
+        except Exception as e:
+            with loader.lock:
+                loader.stats['errors'] += 1
+            print(f"❌ Error importando lote de {collection}: {e}")
+        finally:
+            in_flight.release()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for collection in COLLECTIONS:
+            pending = []
+            for doc in snapshot.iter_docs(collection):
+                pending.append(doc)
+                if len(pending) >= batch_size:
+                    in_flight.acquire()
+                    executor.submit(commit_batch, collection, pending)
+                    pending = []
+            if pending:
+                in_flight.acquire()
+                executor.submit(commit_batch, collection, pending)
+
+    elapsed = time.time() - start_time
+    total_docs = sum(loader.stats[f'{c}_created'] for c in COLLECTIONS)
+
+    print("\n" + "="*50)
+    print("📊 RESUMEN DE IMPORTACIÓN DE SNAPSHOT")
+    print("="*50)
+    for collection in COLLECTIONS:
+        print(f"📄 {collection}: {loader.stats[f'{collection}_created']}/{snapshot.count(collection)}")
+    print(f"❌ Errores: {loader.stats['errors']}")
+    print(f"⏱️  Tiempo total: {elapsed:.2f} segundos")
+    print(f"📈 Velocidad: {total_docs / elapsed if elapsed > 0 else 0:.2f} docs/segundo")
+    print(f"🧹 Limpieza: python teardown.py --run-id {loader.run_id}")
+    return loader.stats
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Snapshots de datos para pruebas de estrés")
+    parser.add_argument('mode', choices=['generate', 'import', 'seed'],
+                        help="generate: solo crear snapshot; import: importar uno existente; "
+                             "seed: generar si falta e importar")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--services', type=int, default=300)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--batch-size', type=int, default=FIRESTORE_BATCH_LIMIT)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--force', action='store_true', help="Regenerar aunque exista en caché")
+    args = parser.parse_args()
+
+    print("🔥 SNAPSHOTS DE DATOS PARA PRUEBAS DE ESTRÉS")
+    print("="*50)
+
+    try:
+        path = snapshot_path(args.seed, args.users, args.services)
+        if args.mode in ('generate', 'seed'):
+            path = SnapshotWriter(chunk_size=args.chunk_size).generate(
+                args.seed, args.users, args.services, force=args.force
+            )
+        if args.mode in ('import', 'seed'):
+            import_snapshot(DatabaseLoader(), path, args.batch_size, args.workers)
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Proxy de Degradación de Red - Teknigo
+Proxy TCP/HTTP asyncio que añade latencia, jitter, límite de ancho de banda
+y resets de conexión por ruta, para probar la app con enlaces tipo móvil
+
+Uso con los harness:
+  locust:    locust -f locustfile.py --host=http://localhost:8080
+  selenium:  config['base_url'] = 'http://localhost:8080'
+  loader:    FIRESTORE_EMULATOR_HOST=localhost:8090 (proxy con --upstream al emulador)
+"""
+
+import json
+import time
+import random
+import signal
+import socket
+import struct
+import asyncio
+import argparse
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Chunks retenidos por dirección y conexión: con ancho de banda limitado el
+# lector espera al escritor en lugar de acumular la respuesta en memoria
+MAX_QUEUED_CHUNKS = 16
+
+HTTP_METHODS = (b'GET ', b'POST ', b'PUT ', b'PATCH ', b'DELETE ', b'HEAD ', b'OPTIONS ')
+
+# Perfil sin degradación; cada ruta puede sobrescribir cualquier campo
+DEFAULT_PROFILE = {
+    'latency_ms': 0,        # retardo de un sentido, aplicado en cada dirección
+    'jitter_ms': 0,         # variación uniforme +/- sobre latency_ms
+    'bandwidth_kbps': 0,    # 0 = sin límite (por dirección y conexión)
+    'reset_rate': 0.0       # probabilidad de reset por petición HTTP
+}
+
+# Perfiles de ejemplo
+PRESETS = {
+    'none': {},
+    '3g': {'latency_ms': 150, 'jitter_ms': 50, 'bandwidth_kbps': 750, 'reset_rate': 0.001},
+    '4g': {'latency_ms': 40, 'jitter_ms': 15, 'bandwidth_kbps': 9000, 'reset_rate': 0.0005},
+    'lossy': {'latency_ms': 80, 'jitter_ms': 60, 'bandwidth_kbps': 2000, 'reset_rate': 0.02}
+}
+
+
+class ImpairmentProxy:
+    def __init__(self, upstream_host, upstream_port, default_profile=None, routes=None,
+                 record_path=None, chunk_size=64 * 1024):
+        """Inicializar proxy
+
+        routes es una lista de (prefijo, perfil); gana el prefijo más largo
+        que coincida con la ruta de la línea de petición HTTP.
+        """
+        self.upstream_host = upstream_host
+        self.upstream_port = upstream_port
+        self.default_profile = dict(DEFAULT_PROFILE, **(default_profile or {}))
+        self.routes = sorted(
+            ((prefix, dict(self.default_profile, **profile)) for prefix, profile in (routes or [])),
+            key=lambda r: len(r[0]),
+            reverse=True
+        )
+        self.record_path = record_path
+        self.chunk_size = chunk_size
+        self.records = []
+        self.stats = {
+            'connections': 0,
+            'active': 0,
+            'peak_active': 0,
+            'resets': 0,
+            'errors': 0,
+            'bytes_up': 0,
+            'bytes_down': 0
+        }
+
+    def profile_for(self, path):
+        for prefix, profile in self.routes:
+            if path.startswith(prefix):
+                return prefix, profile
+        return '*', self.default_profile
+
+    def _route_from_chunk(self, data):
+        """Extraer la ruta de una línea de petición HTTP, si el chunk empieza con una"""
+        if not data.startswith(HTTP_METHODS):
+            return None
+        line = data.split(b'\r\n', 1)[0].split(b' ')
+        return line[1].decode('latin-1') if len(line) > 1 else None
+
+    @staticmethod
+    def _reset(writer):
+        """Cerrar con RST (SO_LINGER=0) en lugar de FIN"""
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            except OSError:
+                pass
+        writer.transport.abort()
+
+    async def _pipe(self, reader, writer, conn, direction):
+        """Copiar datos aplicando el perfil activo de la conexión
+
+        Los chunks se encolan con su hora de entrega y un escritor aparte los
+        envía en orden, así la latencia no serializa la transferencia. La cola
+        es acotada (contrapresión hacia el lector) y un error del escritor se
+        propaga en el siguiente chunk, no al llegar a EOF.
+        """
+        queue = asyncio.Queue(maxsize=MAX_QUEUED_CHUNKS)
+        loop = asyncio.get_running_loop()
+        bytes_key = 'bytes_up' if direction == 'up' else 'bytes_down'
+
+        async def deliver():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                deliver_at, data = item
+                wait = deliver_at - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                writer.write(data)
+                await writer.drain()
+
+        sender = asyncio.create_task(deliver())
+
+        async def enqueue(item):
+            if sender.done():
+                sender.result()  # relanza el error del escritor
+                raise ConnectionError("el escritor terminó antes de tiempo")
+            if not queue.full():
+                queue.put_nowait(item)
+                return
+            # Cola llena: esperar hueco, pero despertar si el escritor falla mientras tanto
+            put = asyncio.ensure_future(queue.put(item))
+            await asyncio.wait({put, sender}, return_when=asyncio.FIRST_COMPLETED)
+            if not put.done():
+                put.cancel()
+                sender.result()
+                raise ConnectionError("el escritor terminó antes de tiempo")
+
+        last_deliver_at = 0.0
+        link_free_at = 0.0
+        try:
+            while True:
+                data = await reader.read(self.chunk_size)
+                if not data:
+                    break
+                now = loop.time()
+                conn[bytes_key] += len(data)
+                if conn['first_byte_ms'] is None and direction == 'down':
+                    conn['first_byte_ms'] = (time.perf_counter() - conn['_start']) * 1000
+
+                if direction == 'up':
+                    path = self._route_from_chunk(data)
+                    if path is not None:
+                        conn['route'], conn['_profile'] = self.profile_for(path)
+                        conn['requests'] += 1
+                        if random.random() < conn['_profile']['reset_rate']:
+                            conn['reset'] = True
+                            raise ConnectionResetError("reset inyectado")
+
+                profile = conn['_profile']
+                delay = profile['latency_ms']
+                if profile['jitter_ms']:
+                    delay += random.uniform(-profile['jitter_ms'], profile['jitter_ms'])
+                deliver_at = now + max(delay, 0) / 1000
+                if profile['bandwidth_kbps']:
+                    # Token bucket simple: el enlace queda ocupado mientras transmite
+                    tx_time = len(data) * 8 / (profile['bandwidth_kbps'] * 1000)
+                    link_free_at = max(link_free_at, now) + tx_time
+                    deliver_at = max(deliver_at, link_free_at)
+                # TCP entrega en orden: el jitter no puede reordenar chunks
+                deliver_at = max(deliver_at, last_deliver_at)
+                # Solo cuenta el retardo que no se solapa con chunks ya retenidos
+                conn['injected_delay_ms'] += (deliver_at - max(now, last_deliver_at)) * 1000
+                last_deliver_at = deliver_at
+                await enqueue((deliver_at, data))
+            await enqueue(None)
+            await sender
+            if writer.can_write_eof():
+                writer.write_eof()
+        finally:
+            if not sender.done():
+                sender.cancel()
+
+    async def handle_client(self, client_reader, client_writer):
+        start = time.perf_counter()
+        conn = {
+            'started': time.time(),
+            'route': '*',
+            'requests': 0,
+            'connect_ms': None,
+            'first_byte_ms': None,
+            'duration_ms': None,
+            'injected_delay_ms': 0.0,
+            'bytes_up': 0,
+            'bytes_down': 0,
+            'reset': False,
+            'error': None,
+            '_start': start,
+            '_profile': self.default_profile
+        }
+        self.stats['connections'] += 1
+        self.stats['active'] += 1
+        self.stats['peak_active'] = max(self.stats['peak_active'], self.stats['active'])
+        upstream_writer = None
+
+        try:
+            upstream_reader, upstream_writer = await asyncio.open_connection(
+                self.upstream_host, self.upstream_port
+            )
+            conn['connect_ms'] = (time.perf_counter() - start) * 1000
+            pipes = [
+                asyncio.create_task(self._pipe(client_reader, upstream_writer, conn, 'up')),
+                asyncio.create_task(self._pipe(upstream_reader, client_writer, conn, 'down'))
+            ]
+            try:
+                await asyncio.gather(*pipes)
+            finally:
+                for pipe in pipes:
+                    pipe.cancel()
+        except ConnectionResetError as e:
+            if conn['reset']:
+                self.stats['resets'] += 1
+                self._reset(client_writer)
+                if upstream_writer is not None:
+                    self._reset(upstream_writer)
+            else:
+                conn['error'] = str(e)
+        except Exception as e:
+            conn['error'] = f"{type(e).__name__}: {e}"
+        finally:
+            if conn['error']:
+                self.stats['errors'] += 1
+            for writer in (client_writer, upstream_writer):
+                if writer is not None and not writer.is_closing():
+                    writer.close()
+            self.stats['active'] -= 1
+            self.stats['bytes_up'] += conn['bytes_up']
+            self.stats['bytes_down'] += conn['bytes_down']
+            conn['duration_ms'] = (time.perf_counter() - start) * 1000
+            # Lo que no es retardo inyectado es overhead del proxy + upstream
+            conn['unimpaired_ms'] = conn['duration_ms'] - conn['injected_delay_ms']
+            self.records.append({k: v for k, v in conn.items() if not k.startswith('_')})
+
+    async def _flush_records(self, interval=5):
+        """Volcar los registros por conexión a NDJSON periódicamente"""
+        while True:
+            await asyncio.sleep(interval)
+            self.flush()
+
+    def flush(self):
+        if not self.record_path or not self.records:
+            self.records.clear()
+            return
+        records, self.records = self.records, []
+        with open(self.record_path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+    async def serve(self, host='0.0.0.0', port=8080, backlog=4096):
+        server = await asyncio.start_server(self.handle_client, host, port, backlog=backlog)
+        flusher = asyncio.create_task(self._flush_records())
+        print(f"🌐 Proxy escuchando en {host}:{port} -> {self.upstream_host}:{self.upstream_port}")
+        print(f"📶 Perfil por defecto: {self.default_profile}")
+        for prefix, profile in self.routes:
+            print(f"   {prefix}: {profile}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            flusher.cancel()
+            self.flush()
+
+    def print_summary(self):
+        print("\n" + "="*50)
+        print("📊 RESUMEN DEL PROXY")
+        print("="*50)
+        print(f"🔌 Conexiones: {self.stats['connections']} (pico concurrente: {self.stats['peak_active']})")
+        print(f"💥 Resets inyectados: {self.stats['resets']}")
+        print(f"❌ Errores: {self.stats['errors']}")
+        print(f"⬆️  Bytes enviados: {self.stats['bytes_up']}")
+        print(f"⬇️  Bytes recibidos: {self.stats['bytes_down']}")
+        if self.record_path:
+            print(f"💾 Registros por conexión: {self.record_path}")
+
+
+def raise_fd_limit():
+    """Subir el límite de descriptores para soportar 10k+ conexiones"""
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return
+    target = hard if hard != resource.RLIM_INFINITY else 65536
+    # Solo subir: un soft ya mayor que el objetivo se respeta
+    if target > soft:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+
+
+def load_config(path):
+    """Cargar perfiles desde JSON: {"default": {...}, "routes": {"/api/": {...}}}"""
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    return config.get('default', {}), list(config.get('routes', {}).items())
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Proxy de degradación de red para pruebas de estrés")
+    parser.add_argument('--listen', type=int, default=8080)
+    parser.add_argument('--upstream', default='localhost:3000', help="host:puerto destino")
+    parser.add_argument('--preset', choices=PRESETS.keys(), default='none')
+    parser.add_argument('--config', help="JSON con perfil por defecto y perfiles por ruta")
+    parser.add_argument('--record', help="Archivo NDJSON para los tiempos por conexión")
+    args = parser.parse_args()
+
+    upstream_host, upstream_port = args.upstream.rsplit(':', 1)
+    default_profile, routes = dict(PRESETS[args.preset]), []
+    if args.config:
+        config_default, routes = load_config(args.config)
+        default_profile.update(config_default)
+
+    raise_fd_limit()
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
+    print("🔥 PROXY DE DEGRADACIÓN DE RED - TEKNIGO")
+    print("="*50)
+
+    proxy = ImpairmentProxy(
+        upstream_host, int(upstream_port),
+        default_profile=default_profile,
+        routes=routes,
+        record_path=args.record
+    )
+    # SIGTERM se trata como Ctrl+C para volcar registros y resumen
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        asyncio.run(proxy.serve(port=args.listen))
+    except KeyboardInterrupt:
+        proxy.flush()
+        proxy.print_summary()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Emulador Ligero de Carga de Páginas - Teknigo
+Alternativa barata a un navegador real: descarga la página de Next.js, extrae
+los chunks de _next/static (JS y CSS) y los descarga con el paralelismo y la
+reutilización de conexiones de un navegador, midiendo TTFB y la cascada
+completa de recursos
+"""
+
+import sys
+import time
+import random
+import asyncio
+import argparse
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse
+import aiohttp
+
+from perf_baseline import RunRecorder, load_run, histogram_percentile, percentile
+from impairment_proxy import raise_fd_limit
+
+PUBLIC_ROUTES = ['/', '/about', '/technicians', '/login']
+# Conexiones simultáneas por host de Chrome con HTTP/1.1
+CONNECTIONS_PER_HOST = 6
+
+
+class _AssetParser(HTMLParser):
+    """Extraer scripts y hojas de estilo de _next/static del HTML"""
+
+    def __init__(self):
+        super().__init__()
+        self.assets = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'script' and attrs.get('src'):
+            url = attrs['src']
+        elif tag == 'link' and attrs.get('href') and (
+                attrs.get('rel') == 'stylesheet' or
+                (attrs.get('rel') == 'preload' and attrs.get('as') in ('script', 'style'))):
+            url = attrs['href']
+        else:
+            return
+        if '/_next/static/' in url and url not in self.assets:
+            self.assets.append(url)
+
+
+def extract_assets(html, page_url):
+    parser = _AssetParser()
+    parser.feed(html)
+    return [urljoin(page_url, url) for url in parser.assets]
+
+
+class PageLoadEmulator:
+    def __init__(self, base_url="http://localhost:3000", routes=PUBLIC_ROUTES,
+                 virtual_users=200, warm_cache=True, timeout=30):
+        """Inicializar emulador
+
+        Cada usuario virtual tiene su propia sesión (pool de conexiones con
+        keep-alive) y, con warm_cache, una caché de assets inmutables como la
+        del navegador.
+        """
+        self.base_url = base_url
+        self.routes = routes
+        self.virtual_users = virtual_users
+        self.warm_cache = warm_cache
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.results = {route: {'ttfb': [], 'html': [], 'full': [], 'assets': [], 'errors': 0}
+                        for route in routes}
+        self.recorder = RunRecorder('page_emulator')
+
+    async def _fetch_asset(self, session, url, cache):
+        if url in cache:
+            return 0
+        async with session.get(url) as response:
+            body = await response.read()
+            if response.status >= 400:
+                raise Exception(f"HTTP {response.status} en {url}")
+        if self.warm_cache:
+            cache.add(url)
+        return len(body)
+
+    async def load_page(self, session, route, cache):
+        """Una carga de página: documento + cascada de assets en paralelo"""
+        page_url = urljoin(self.base_url, route)
+        start = time.perf_counter()
+        async with session.get(page_url) as response:
+            ttfb = time.perf_counter() - start
+            html = await response.text()
+            status = response.status
+        html_time = time.perf_counter() - start
+        if status >= 400:
+            raise Exception(f"HTTP {status} en {route}")
+
+        assets = extract_assets(html, page_url)
+        # Los assets de otros hosts (CDN) no comparten el pool del documento
+        await asyncio.gather(*(
+            self._fetch_asset(session, url, cache)
+            for url in assets if urlparse(url).netloc == urlparse(page_url).netloc
+        ))
+        return ttfb, html_time, time.perf_counter() - start, len(assets)
+
+    async def _virtual_user(self, loads, deadline):
+        connector = aiohttp.TCPConnector(limit_per_host=CONNECTIONS_PER_HOST, keepalive_timeout=30)
+        cache = set()
+        async with aiohttp.ClientSession(connector=connector, timeout=self.timeout) as session:
+            while time.time() < deadline:
+                async with loads['lock']:
+                    if loads['remaining'] <= 0:
+                        return
+                    loads['remaining'] -= 1
+                route = random.choice(self.routes)
+                result = self.results[route]
+                try:
+                    ttfb, html_time, full, assets = await self.load_page(session, route, cache)
+                except Exception:
+                    result['errors'] += 1
+                    continue
+                result['ttfb'].append(ttfb)
+                result['html'].append(html_time)
+                result['full'].append(full)
+                result['assets'].append(assets)
+                self.recorder.add_latency(f"{route} ttfb", ttfb)
+                self.recorder.add_latency(f"{route} full", full)
+                self.recorder.add_completions('page_loads')
+
+    async def run(self, total_loads=10000, max_duration=600):
+        print(f"🚀 Iniciando emulación de cargas de página")
+        print(f"🌐 Rutas: {', '.join(self.routes)}")
+        print(f"👥 Usuarios virtuales: {self.virtual_users} | 📄 Cargas: {total_loads}")
+        print(f"🗄️  Caché de assets: {'caliente' if self.warm_cache else 'fría'}")
+
+        loads = {'remaining': total_loads, 'lock': asyncio.Lock()}
+        start = time.time()
+        await asyncio.gather(*(
+            self._virtual_user(loads, start + max_duration) for _ in range(self.virtual_users)
+        ))
+        elapsed = time.time() - start
+
+        completed = sum(len(r['full']) for r in self.results.values())
+        self.print_results(completed, elapsed)
+        self.recorder.save()
+        return self.results
+
+    def print_results(self, completed, elapsed):
+        print("\n" + "="*72)
+        print("📊 RESULTADOS DEL EMULADOR DE CARGA DE PÁGINAS")
+        print("="*72)
+        print(f"📄 Cargas completadas: {completed} en {elapsed:.1f}s ({completed / elapsed:.1f} páginas/s)")
+        print(f"{'ruta':<14} {'cargas':>7} {'err':>5} {'assets':>7} {'TTFB p50':>9} {'TTFB p95':>9} "
+              f"{'total p50':>10} {'total p95':>10}")
+        for route, r in self.results.items():
+            if not r['full']:
+                print(f"{route:<14} {0:>7} {r['errors']:>5}")
+                continue
+            print(f"{route:<14} {len(r['full']):>7} {r['errors']:>5} "
+                  f"{sum(r['assets']) / len(r['assets']):>7.1f} "
+                  f"{percentile(r['ttfb'], 50):>8.3f}s {percentile(r['ttfb'], 95):>8.3f}s "
+                  f"{percentile(r['full'], 50):>9.3f}s {percentile(r['full'], 95):>9.3f}s")
+
+    def compare_with_selenium(self, run_path, route='/', scenario='page_load'):
+        """Validar contra la distribución de page_load de e2e_stress_test.py"""
+        run = load_run(run_path)
+        data = run['scenarios'].get(scenario)
+        full = self.results.get(route, {}).get('full')
+        if not data or not data['bins'] or not full:
+            print(f"⚠️  Sin datos comparables para {route} / {scenario}")
+            return None
+        print(f"\n🔬 Validación contra Selenium ({route}):")
+        ratios = {}
+        for pct in (50, 95):
+            selenium = histogram_percentile(data['bins'], data['hist_base'], pct) / 1000
+            emulated = percentile(full, pct)
+            ratios[pct] = emulated / selenium if selenium else 0
+            print(f"   p{pct}: emulador {emulated:.3f}s vs Selenium {selenium:.3f}s "
+                  f"(x{ratios[pct]:.2f})")
+        print("   💡 La diferencia restante es render/JS del navegador, que el emulador no ejecuta")
+        return ratios
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Emulador HTTP de cargas de página de Next.js")
+    parser.add_argument('--base-url', default='http://localhost:3000')
+    parser.add_argument('--routes', nargs='+', default=PUBLIC_ROUTES)
+    parser.add_argument('--loads', type=int, default=10000)
+    parser.add_argument('--users', type=int, default=200, help="Usuarios virtuales concurrentes")
+    parser.add_argument('--cold', action='store_true', help="Sin caché de assets entre cargas")
+    parser.add_argument('--max-duration', type=float, default=600)
+    parser.add_argument('--compare-run', help="Archivo de ejecución de Selenium para validar")
+    args = parser.parse_args()
+
+    print("🔥 EMULADOR DE CARGA DE PÁGINAS - TEKNIGO")
+    print("="*50)
+
+    # usuarios x CONNECTIONS_PER_HOST sockets con caché fría supera el límite típico de 1024
+    raise_fd_limit()
+    emulator = PageLoadEmulator(
+        base_url=args.base_url,
+        routes=args.routes,
+        virtual_users=args.users,
+        warm_cache=not args.cold
+    )
+    try:
+        asyncio.run(emulator.run(args.loads, args.max_duration))
+    except KeyboardInterrupt:
+        sys.exit(1)
+    if args.compare_run:
+        emulator.compare_with_selenium(args.compare_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Líneas Base y Comparación de Rendimiento - Teknigo
+Guarda las distribuciones de latencia y el throughput por ventana de cada
+ejecución por escenario, y compara una ejecución nueva contra una línea base con
+Mann-Whitney U; termina con código 1 si hay una regresión significativa
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from datetime import datetime
+from collections.abc import Mapping
+
+REPORTS_DIR = os.path.join(os.path.dirname(__file__), '../reports')
+RUNS_DIR = os.path.join(REPORTS_DIR, 'runs')
+BASELINES_DIR = os.path.join(REPORTS_DIR, 'baselines')
+# Histograma logarítmico con ~1% de resolución: compacto y sin guardar cada muestra
+DEFAULT_HIST_BASE = 1.01
+# Ventana (s) de las muestras de throughput: una por ventana completa de la ejecución
+DEFAULT_WINDOW = 1.0
+# Con n ventanas por lado el p mínimo de Mann-Whitney es ~1/C(2n, n): por debajo
+# de 10 no alcanzaría alphas usuales y la prueba nunca podría fallar
+MIN_THROUGHPUT_WINDOWS = 10
+
+
+def _bin(millis, hist_base):
+    return int(math.log(max(millis, 1.0)) / math.log(hist_base))
+
+
+def _bin_value(index, hist_base):
+    """Valor representativo (ms) de un bin: su punto medio geométrico"""
+    return hist_base ** (index + 0.5)
+
+
+class RunRecorder:
+    def __init__(self, harness, hist_base=DEFAULT_HIST_BASE, window=DEFAULT_WINDOW):
+        """Registrar latencias y throughput de una ejecución de un harness"""
+        self.harness = harness
+        self.hist_base = hist_base
+        self.window = window
+        self.lock = threading.Lock()
+        self.scenarios = {}
+        self._windows = {}  # escenario -> {índice de ventana: operaciones completadas}
+
+    def _scenario(self, name, hist_base=None):
+        scenario = self.scenarios.get(name)
+        if scenario is None:
+            scenario = self.scenarios[name] = {
+                'hist_base': hist_base or self.hist_base,
+                'bins': {},
+                'throughput': []
+            }
+        return scenario
+
+    def add_latency(self, scenario, seconds, count=1):
+        with self.lock:
+            data = self._scenario(scenario)
+            index = _bin(seconds * 1000, data['hist_base'])
+            data['bins'][index] = data['bins'].get(index, 0) + count
+
+    def add_histogram(self, scenario, hist_base, counts):
+        """Añadir un histograma ya agregado (bins con la misma base logarítmica en ms)"""
+        with self.lock:
+            data = self._scenario(scenario, hist_base)
+            if data['hist_base'] != hist_base:
+                raise ValueError(f"Base de histograma distinta para {scenario}")
+            # Mapping {bin: cantidad} o cualquier secuencia indexada por bin (list, array)
+            for index, count in counts.items() if isinstance(counts, Mapping) else enumerate(counts):
+                if count:
+                    data['bins'][int(index)] = data['bins'].get(int(index), 0) + count
+
+    def add_throughput(self, scenario, ops_per_second):
+        """Añadir una muestra de throughput ya medida (una por ventana, no por ejecución)"""
+        with self.lock:
+            self._scenario(scenario)['throughput'].append(ops_per_second)
+
+    def add_completions(self, scenario, count=1, timestamp=None):
+        """Contar operaciones completadas en la ventana de timestamp (por defecto, ahora)
+
+        save() convierte los conteos en una muestra de throughput por ventana
+        completa, así compare_runs tiene muestras suficientes para la prueba.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        index = int(timestamp // self.window)
+        with self.lock:
+            self._scenario(scenario)
+            windows = self._windows.setdefault(scenario, {})
+            windows[index] = windows.get(index, 0) + count
+
+    def _flush_windows(self):
+        for scenario, windows in self._windows.items():
+            # La primera y la última ventana son parciales; las vacías intermedias cuentan (paradas)
+            first, last = min(windows), max(windows)
+            self.scenarios[scenario]['throughput'].extend(
+                windows.get(index, 0) / self.window for index in range(first + 1, last)
+            )
+        self._windows = {}
+
+    def save(self, path=None):
+        if path is None:
+            os.makedirs(RUNS_DIR, exist_ok=True)
+            path = os.path.join(RUNS_DIR, f"{self.harness}-{datetime.now():%Y%m%d-%H%M%S}.json")
+        with self.lock:
+            self._flush_windows()
+            run = {
+                'harness': self.harness,
+                'created': datetime.now().isoformat(),
+                'scenarios': self.scenarios
+            }
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(run, f, indent=2)
+        print(f"💾 Ejecución guardada para comparación: {path}")
+        return path
+
+
+def load_run(path):
+    with open(path, encoding='utf-8') as f:
+        run = json.load(f)
+    for scenario in run['scenarios'].values():
+        scenario['bins'] = {int(k): v for k, v in scenario['bins'].items()}
+    return run
+
+
+def histogram_percentile(bins, hist_base, pct):
+    total = sum(bins.values())
+    if not total:
+        return 0.0
+    target = math.ceil(pct / 100 * total)
+    seen = 0
+    for index in sorted(bins):
+        seen += bins[index]
+        if seen >= target:
+            return _bin_value(index, hist_base)
+    return _bin_value(max(bins), hist_base)
+
+
+def percentile(values, pct):
+    """Percentil por rango más cercano sobre muestras sin agrupar"""
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, math.ceil(pct / 100 * len(values)) - 1))]
+
+
+def bootstrap_ci(samples, statistic, confidence=0.95, iterations=2000, seed=0):
+    """IC bootstrap (percentil) de statistic(*samples)
+
+    Cada muestra de samples se remuestrea por separado, así sirve tanto para
+    un estadístico de una muestra como para diferencias entre dos.
+    """
+    rng = random.Random(seed)
+    estimates = [
+        statistic(*(rng.choices(sample, k=len(sample)) for sample in samples))
+        for _ in range(iterations)
+    ]
+    alpha = (1 - confidence) / 2 * 100
+    return percentile(estimates, alpha), percentile(estimates, 100 - alpha)
+
+
+def mann_whitney_greater(baseline, candidate):
+    """Mann-Whitney U unilateral sobre datos agrupados: ¿candidate > baseline?
+
+    baseline y candidate son dicts valor -> cantidad; los empates (mismo bin)
+    reciben rango promedio y se corrige la varianza. Devuelve (U, p, probabilidad
+    de superioridad).
+    """
+    n1 = sum(baseline.values())
+    n2 = sum(candidate.values())
+    if not n1 or not n2:
+        return 0.0, 1.0, 0.5
+    n = n1 + n2
+    rank = 0
+    rank_sum = 0.0
+    tie_term = 0.0
+    for value in sorted(set(baseline) | set(candidate)):
+        ties = baseline.get(value, 0) + candidate.get(value, 0)
+        average_rank = rank + (ties + 1) / 2
+        rank_sum += candidate.get(value, 0) * average_rank
+        tie_term += ties ** 3 - ties
+        rank += ties
+    u = rank_sum - n2 * (n2 + 1) / 2
+    mean = n1 * n2 / 2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))) if n > 1 else 0
+    if variance <= 0:
+        return u, 1.0, u / (n1 * n2)
+    z = (u - mean - 0.5) / math.sqrt(variance)  # corrección de continuidad
+    p = 0.5 * math.erfc(z / math.sqrt(2))
+    return u, p, u / (n1 * n2)
+
+
+def _counts(values):
+    counts = {}
+    for value in values:
+        counts[value] = counts.get(value, 0) + 1
+    return counts
+
+
+def compare_runs(baseline, candidate, alpha=0.01, min_effect=0.05):
+    """Comparar escenario por escenario; devuelve la lista de hallazgos"""
+    findings = []
+    for name, base in baseline['scenarios'].items():
+        new = candidate['scenarios'].get(name)
+        if new is None:
+            findings.append({'scenario': name, 'status': 'missing'})
+            continue
+        finding = {'scenario': name, 'status': 'ok'}
+
+        if base['bins'] and new['bins']:
+            if base['hist_base'] != new['hist_base']:
+                raise ValueError(f"Histogramas incompatibles en {name}")
+            hist_base = base['hist_base']
+            _, p, superiority = mann_whitney_greater(base['bins'], new['bins'])
+            p50_ratio = (histogram_percentile(new['bins'], hist_base, 50) /
+                         histogram_percentile(base['bins'], hist_base, 50))
+            p95_ratio = (histogram_percentile(new['bins'], hist_base, 95) /
+                         histogram_percentile(base['bins'], hist_base, 95))
+            finding.update({
+                'latency_p_value': p,
+                'prob_slower': superiority,
+                'p50_ratio': p50_ratio,
+                'p95_ratio': p95_ratio
+            })
+            # Significativa y además relevante en la práctica
+            if p < alpha and max(p50_ratio, p95_ratio) > 1 + min_effect:
+                finding['status'] = 'regression'
+
+        if base['throughput'] and new['throughput']:
+            base_mean = sum(base['throughput']) / len(base['throughput'])
+            new_mean = sum(new['throughput']) / len(new['throughput'])
+            ratio = new_mean / base_mean if base_mean else 1.0
+            finding['throughput_ratio'] = ratio
+            # Con pocas ventanas por lado la prueba no tiene potencia: solo se informa
+            if min(len(base['throughput']), len(new['throughput'])) >= MIN_THROUGHPUT_WINDOWS:
+                # Menor throughput en la ejecución nueva = baseline "mayor"
+                _, p, _ = mann_whitney_greater(_counts(new['throughput']), _counts(base['throughput']))
+                finding['throughput_p_value'] = p
+                if p < alpha and ratio < 1 - min_effect:
+                    finding['status'] = 'regression'
+
+        findings.append(finding)
+    return findings
+
+
+def print_findings(findings):
+    print("\n" + "="*60)
+    print("📊 COMPARACIÓN CONTRA LÍNEA BASE")
+    print("="*60)
+    for f in findings:
+        icon = {'ok': '✅', 'regression': '❌', 'missing': '⚠️ '}[f['status']]
+        print(f"{icon} {f['scenario']}: {f['status']}")
+        if 'latency_p_value' in f:
+            print(f"    p50 x{f['p50_ratio']:.3f} | p95 x{f['p95_ratio']:.3f} | "
+                  f"P(más lento)={f['prob_slower']:.3f} | p={f['latency_p_value']:.4g}")
+        if 'throughput_ratio' in f:
+            extra = (f" | p={f['throughput_p_value']:.4g}" if 'throughput_p_value' in f
+                     else f" | sin prueba (< {MIN_THROUGHPUT_WINDOWS} ventanas), solo informativo")
+            print(f"    throughput x{f['throughput_ratio']:.3f}{extra}")
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Líneas base y detección de regresiones")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    save = subparsers.add_parser('save', help="Guardar una ejecución como línea base")
+    save.add_argument('run')
+    save.add_argument('--name', required=True)
+
+    compare = subparsers.add_parser('compare', help="Comparar una ejecución contra una línea base")
+    compare.add_argument('run')
+    compare.add_argument('--baseline', required=True, help="Nombre de la línea base")
+    compare.add_argument('--alpha', type=float, default=0.01)
+    compare.add_argument('--min-effect', type=float, default=0.05,
+                         help="Cambio relativo mínimo para considerar regresión")
+    args = parser.parse_args()
+
+    if args.command == 'save':
+        os.makedirs(BASELINES_DIR, exist_ok=True)
+        run = load_run(args.run)
+        path = os.path.join(BASELINES_DIR, f"{args.name}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(run, f, indent=2)
+        print(f"✅ Línea base '{args.name}' guardada ({len(run['scenarios'])} escenarios)")
+        return
+
+    baseline = load_run(os.path.join(BASELINES_DIR, f"{args.baseline}.json"))
+    findings = compare_runs(baseline, load_run(args.run), args.alpha, args.min_effect)
+    print_findings(findings)
+    if any(f['status'] == 'regression' for f in findings):
+        print("\n❌ Regresión de rendimiento significativa")
+        sys.exit(1)
+    print("\n✅ Sin regresiones significativas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Monitor de Recursos del Generador de Carga - Teknigo
+Muestrea en segundo plano CPU, memoria, sockets, hilos y cambios de contexto
+del propio proceso generador para detectar si el cuello de botella fue el
+harness y no la aplicación
+"""
+
+import time
+import threading
+import psutil
+
+# Umbrales por defecto; una ejecución que los supere de forma sostenida
+# se marca como no confiable
+DEFAULT_THRESHOLDS = {
+    'process_cpu_percent': 90.0,   # % de un núcleo (el GIL limita a ~100%)
+    'system_cpu_percent': 90.0,
+    'rss_mb': 2048,
+    'children_rss_mb': 4096,       # procesos hijos (navegadores, drivers)
+    'open_sockets': 10000
+}
+
+
+class ResourceMonitor:
+    def __init__(self, name, interval=1.0, thresholds=None, include_children=False, min_consecutive=3):
+        """Inicializar monitor para el proceso actual
+
+        Un umbral solo se considera superado si se mantiene durante
+        min_consecutive muestras seguidas, para ignorar picos aislados.
+        """
+        self.name = name
+        self.interval = interval
+        self.thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+        self.include_children = include_children
+        self.min_consecutive = min_consecutive
+        self.process = psutil.Process()
+        self.samples = []
+        self.violations = {}
+        self._streaks = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _children_rss(self):
+        total = 0
+        for child in self.process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return total
+
+    def _take_sample(self, last_ctx, last_time):
+        now = time.time()
+        with self.process.oneshot():
+            ctx = self.process.num_ctx_switches()
+            sample = {
+                'timestamp': now,
+                'process_cpu_percent': self.process.cpu_percent(),
+                'system_cpu_percent': psutil.cpu_percent(),
+                'rss_mb': self.process.memory_info().rss / 1024 / 1024,
+                'threads': self.process.num_threads(),
+                'open_sockets': len(self.process.connections(kind='inet'))
+            }
+        ctx_total = ctx.voluntary + ctx.involuntary
+        sample['ctx_switches_per_s'] = (ctx_total - last_ctx) / max(now - last_time, 1e-6)
+        if self.include_children:
+            sample['children_rss_mb'] = self._children_rss() / 1024 / 1024
+        return sample, ctx_total, now
+
+    def _check_thresholds(self, sample):
+        for metric, limit in self.thresholds.items():
+            if limit is None or metric not in sample:
+                continue
+            if sample[metric] > limit:
+                self._streaks[metric] = self._streaks.get(metric, 0) + 1
+                if self._streaks[metric] >= self.min_consecutive:
+                    peak = max(self.violations.get(metric, 0), sample[metric])
+                    self.violations[metric] = peak
+            else:
+                self._streaks[metric] = 0
+
+    def _run(self):
+        # La primera llamada a cpu_percent solo fija la referencia
+        self.process.cpu_percent()
+        psutil.cpu_percent()
+        ctx = self.process.num_ctx_switches()
+        last_ctx, last_time = ctx.voluntary + ctx.involuntary, time.time()
+
+        while not self._stop_event.wait(self.interval):
+            try:
+                sample, last_ctx, last_time = self._take_sample(last_ctx, last_time)
+            except psutil.Error:
+                continue
+            self.samples.append(sample)
+            self._check_thresholds(sample)
+
+    def start(self):
+        """Iniciar muestreo en un hilo daemon"""
+        self._thread = threading.Thread(target=self._run, name=f"monitor-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Detener muestreo y devolver el resumen"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval * 2)
+        return self.summary()
+
+    @property
+    def trustworthy(self):
+        return not self.violations
+
+    def summary(self):
+        summary = {
+            'name': self.name,
+            'samples': len(self.samples),
+            'trustworthy': self.trustworthy,
+            'violations': dict(self.violations)
+        }
+        if self.samples:
+            metrics = [k for k in self.samples[0] if k != 'timestamp']
+            for metric in metrics:
+                values = [s[metric] for s in self.samples if metric in s]
+                summary[f'{metric}_max'] = max(values)
+                summary[f'{metric}_avg'] = sum(values) / len(values)
+        return summary
+
+    def print_summary(self):
+        summary = self.summary()
+        print(f"\n🖥️  Recursos del generador ({self.name}):")
+        if not self.samples:
+            print("   Sin muestras (ejecución demasiado corta)")
+            return summary
+        print(f"   CPU proceso: {summary['process_cpu_percent_avg']:.1f}% prom / "
+              f"{summary['process_cpu_percent_max']:.1f}% máx")
+        print(f"   CPU sistema: {summary['system_cpu_percent_max']:.1f}% máx")
+        print(f"   RSS: {summary['rss_mb_max']:.1f} MB máx")
+        print(f"   Hilos: {summary['threads_max']} máx | Sockets: {summary['open_sockets_max']} máx")
+        print(f"   Cambios de contexto: {summary['ctx_switches_per_s_avg']:.0f}/s prom")
+        if 'children_rss_mb_max' in summary:
+            print(f"   RSS procesos hijos: {summary['children_rss_mb_max']:.1f} MB máx")
+        if self.trustworthy:
+            print("   ✅ El generador no se saturó")
+        else:
+            print("   ⚠️  GENERADOR SATURADO - resultados no confiables:")
+            for metric, peak in self.violations.items():
+                print(f"      {metric}: {peak:.1f} > {self.thresholds[metric]}")
+        return summary
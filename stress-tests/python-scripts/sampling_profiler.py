@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Profiler por Muestreo para los Harness - Teknigo
+Toma instantáneas de las pilas de todos los hilos a intervalos fijos y las
+agrega en formato collapsed-stack (flamegraph.pl / speedscope), junto con
+contadores de tiempo de pared por fase (generate / batch / commit)
+"""
+
+import os
+import re
+import sys
+import time
+import threading
+from datetime import datetime
+from contextlib import nullcontext
+
+PROFILES_DIR = os.path.join(os.path.dirname(__file__), '../reports/profiles')
+
+_NULL_PHASE = nullcontext()
+_active = None
+
+
+class _Phase:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._push(self.name)
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler._pop(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class SamplingProfiler:
+    def __init__(self, harness, interval=0.005, output=None):
+        """Inicializar profiler; interval en segundos entre muestras"""
+        self.harness = harness
+        self.interval = interval
+        self.output = output
+        self.stacks = {}
+        self.samples = 0
+        self._current_phase = {}   # ident de hilo -> pila de fases (la escribe su hilo)
+        self._phase_times = []     # un dict de tiempos por hilo, sin lock en la ruta caliente
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def _push(self, name):
+        ident = threading.get_ident()
+        stack = self._current_phase.get(ident)
+        if stack is None:
+            stack = self._current_phase[ident] = []
+        stack.append(name)
+
+    def _pop(self, name, elapsed):
+        self._current_phase[threading.get_ident()].pop()
+        times = getattr(self._local, 'times', None)
+        if times is None:
+            times = self._local.times = {}
+            with self._lock:
+                self._phase_times.append(times)
+        times[name] = times.get(name, 0.0) + elapsed
+
+    def _sample(self, own_ident):
+        # Agrupar los hilos de un mismo pool (ThreadPoolExecutor-0_3 -> ThreadPoolExecutor)
+        names = {t.ident: re.sub(r'[-_]\d+', '', t.name) for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            frames = []
+            leaf = frame
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+                frame = frame.f_back
+            frames.reverse()
+            # La línea de la hoja distingue esperas (p. ej. "with self.lock") del trabajo
+            frames[-1] = f"{frames[-1][:-1]}:{leaf.f_lineno})"
+            phases = self._current_phase.get(ident)
+            prefix = [names.get(ident, str(ident))]
+            if phases:
+                prefix.append(f"phase:{phases[-1]}")
+            key = ';'.join(prefix + frames)
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+        self.samples += 1
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            self._sample(own_ident)
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+        self.wall_time = time.perf_counter() - self._started
+        return self.write_collapsed()
+
+    def phase_totals(self):
+        totals = {}
+        for times in list(self._phase_times):
+            for name, elapsed in list(times.items()):
+                totals[name] = totals.get(name, 0.0) + elapsed
+        return totals
+
+    def write_collapsed(self):
+        path = self.output
+        if path is None:
+            os.makedirs(PROFILES_DIR, exist_ok=True)
+            path = os.path.join(PROFILES_DIR, f"{self.harness}-{datetime.now():%Y%m%d-%H%M%S}.collapsed")
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+        self.output = path
+        return path
+
+    def print_summary(self):
+        print(f"\n🔬 Perfil del harness ({self.samples} muestras cada {self.interval * 1000:.0f}ms):")
+        totals = self.phase_totals()
+        # Tiempo de hilo acumulado: con N workers puede superar el tiempo de pared
+        for name, elapsed in sorted(totals.items(), key=lambda x: x[1], reverse=True):
+            print(f"   {name:<10} {elapsed:>9.2f}s hilo ({elapsed / self.wall_time:>6.2f}x pared)")
+        leaves = {}
+        for stack, count in self.stacks.items():
+            leaf = stack.rsplit(';', 1)[-1]
+            leaves[leaf] = leaves.get(leaf, 0) + count
+        total = sum(leaves.values()) or 1
+        print("   Funciones más frecuentes (hoja de pila):")
+        for leaf, count in sorted(leaves.items(), key=lambda x: x[1], reverse=True)[:8]:
+            print(f"     {count / total * 100:>5.1f}%  {leaf}")
+        print(f"   🔥 Flamegraph: flamegraph.pl {self.output} > perfil.svg (o abrir en speedscope)")
+
+
+def phase(name):
+    """Contexto de fase; no hace nada si el profiler no está activo"""
+    return _active.phase(name) if _active is not None else _NULL_PHASE
+
+
+def enable(harness, interval=0.005, output=None):
+    global _active
+    _active = SamplingProfiler(harness, interval, output).start()
+    return _active
+
+
+def disable():
+    """Detener el profiler activo, escribir el perfil y mostrar el resumen"""
+    global _active
+    profiler, _active = _active, None
+    if profiler is None:
+        return None
+    profiler.stop()
+    profiler.print_summary()
+    return profiler
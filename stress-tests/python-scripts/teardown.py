@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Limpieza de Datos de Prueba - Teknigo
+Borra en paralelo los documentos sintéticos etiquetados con un run ID
+"""
+
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions, BulkWriterMode
+
+from database_loader import DatabaseLoader, RUN_ID_FIELD
+
+COLLECTIONS = ['users', 'services', 'reviews']
+
+
+class DataTeardown:
+    def __init__(self, db, page_size=1000, max_ops_per_second=5000, max_retries=5):
+        """Inicializar borrado masivo sobre un cliente de Firestore"""
+        self.db = db
+        self.page_size = page_size
+        self.max_ops_per_second = max_ops_per_second
+        self.max_retries = max_retries
+        self.lock = threading.Lock()
+        self.stats = {
+            'docs_deleted': 0,
+            'docs_failed': 0,
+            'retries': 0
+        }
+
+    def _query(self, collection, run_id):
+        """Consulta de documentos sintéticos; run_id=None abarca todas las ejecuciones"""
+        ref = self.db.collection(collection)
+        if run_id:
+            query = ref.where(RUN_ID_FIELD, '==', run_id)
+        else:
+            # where() no acepta None salvo con '=='; todo run ID es un string no vacío
+            query = ref.where(RUN_ID_FIELD, '>', '').order_by(RUN_ID_FIELD)
+        # Proyección mínima: una lista vacía devuelve todos los campos, y el
+        # cursor de start_after necesita el campo del order_by
+        return query.select([RUN_ID_FIELD]).limit(self.page_size)
+
+    def _on_write_result(self, reference, result, bulk_writer):
+        with self.lock:
+            self.stats['docs_deleted'] += 1
+
+    def _on_write_error(self, error, bulk_writer):
+        """Reintentar con backoff del BulkWriter hasta max_retries"""
+        if error.attempts < self.max_retries:
+            with self.lock:
+                self.stats['retries'] += 1
+            return True
+        with self.lock:
+            self.stats['docs_failed'] += 1
+        print(f"❌ Error borrando {error.operation.reference.path}: {error.message}")
+        return False
+
+    def delete_collection(self, collection, run_id):
+        """Paginar los documentos etiquetados y borrarlos con un BulkWriter"""
+        writer = self.db.bulk_writer(options=BulkWriterOptions(
+            initial_ops_per_second=min(500, self.max_ops_per_second),
+            max_ops_per_second=self.max_ops_per_second,
+            mode=BulkWriterMode.parallel
+        ))
+        writer.on_write_result(self._on_write_result)
+        writer.on_write_error(self._on_write_error)
+
+        query = self._query(collection, run_id)
+        queued = 0
+        last_doc = None
+        try:
+            while True:
+                page = query.start_after(last_doc).get() if last_doc else query.get()
+                if not page:
+                    break
+                for doc in page:
+                    writer.delete(doc.reference)
+                queued += len(page)
+                last_doc = page[-1]
+                if len(page) < self.page_size:
+                    break
+        finally:
+            writer.close()
+        return queued
+
+    def _report_progress(self, stop_event, start_time, interval=5):
+        while not stop_event.wait(interval):
+            elapsed = time.time() - start_time
+            deleted = self.stats['docs_deleted']
+            print(f"🧹 {deleted} docs borrados ({deleted / elapsed:.0f} docs/segundo)")
+
+    def run(self, run_id=None, collections=COLLECTIONS):
+        """Borrar todas las colecciones en paralelo"""
+        target = run_id or 'TODAS las ejecuciones'
+        print(f"🧹 Iniciando limpieza de datos de prueba ({target})")
+        print(f"📄 Colecciones: {', '.join(collections)}")
+
+        start_time = time.time()
+        stop_event = threading.Event()
+        reporter = threading.Thread(
+            target=self._report_progress, args=(stop_event, start_time), daemon=True
+        )
+        reporter.start()
+
+        try:
+            with ThreadPoolExecutor(max_workers=len(collections)) as executor:
+                futures = {
+                    executor.submit(self.delete_collection, collection, run_id): collection
+                    for collection in collections
+                }
+                for future, collection in futures.items():
+                    try:
+                        print(f"✅ {collection}: {future.result()} docs procesados")
+                    except Exception as e:
+                        print(f"❌ Error limpiando {collection}: {e}")
+        finally:
+            stop_event.set()
+
+        elapsed = time.time() - start_time
+
+        print("\n" + "="*50)
+        print("📊 RESUMEN DE LIMPIEZA")
+        print("="*50)
+        print(f"🗑️  Documentos borrados: {self.stats['docs_deleted']}")
+        print(f"🔁 Reintentos: {self.stats['retries']}")
+        print(f"❌ Fallidos: {self.stats['docs_failed']}")
+        print(f"⏱️  Tiempo total: {elapsed:.2f} segundos")
+        print(f"📈 Velocidad: {self.stats['docs_deleted'] / elapsed if elapsed > 0 else 0:.2f} docs/segundo")
+        return self.stats
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Borrar datos sintéticos de pruebas de estrés")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--run-id', help="Borrar solo los documentos de esta ejecución")
+    group.add_argument('--all', action='store_true', help="Borrar los documentos de todas las ejecuciones")
+    parser.add_argument('--collections', nargs='+', default=COLLECTIONS)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--max-ops', type=int, default=5000, help="Límite de borrados por segundo")
+    parser.add_argument('--max-retries', type=int, default=5)
+    args = parser.parse_args()
+
+    print("🔥 LIMPIEZA DE DATOS DE PRUEBAS DE ESTRÉS")
+    print("="*50)
+
+    try:
+        db = DatabaseLoader().db
+        teardown = DataTeardown(
+            db,
+            page_size=args.page_size,
+            max_ops_per_second=args.max_ops,
+            max_retries=args.max_retries
+        )
+        stats = teardown.run(run_id=args.run_id, collections=args.collections)
+        if stats['docs_failed']:
+            sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Error durante la limpieza: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Muestreo de Visibilidad Lectura-tras-Escritura - Teknigo
+Durante una carga masiva toma una fracción de los documentos ya confirmados
+(batch.commit() devolvió) y consulta las mismas formas de query que usa la app
+hasta que aparecen, midiendo el retraso escritura -> consulta por forma y
+contando los que nunca aparecen dentro del timeout. La espera en la cola del
+propio verificador se registra aparte por muestra, y se cuentan las muestras
+ya visibles en el primer sondeo (su retraso es solo una cota superior)
+"""
+
+import time
+import queue
+import random
+import threading
+from firebase_admin import firestore
+
+DESCENDING = firestore.Query.DESCENDING
+
+# colección -> [(forma, aplica al documento, query de la app)]; mismas queries que src/
+QUERY_SHAPES = {
+    'services': [
+        # TechnicianDashboard: solicitudes pendientes
+        ('pending_by_date',
+         lambda d: d.get('status') == 'pending',
+         lambda ref, d: ref.where('status', '==', 'pending').order_by('createdAt', direction=DESCENDING)),
+        # ClientDashboard: servicios del cliente
+        ('client_by_date',
+         lambda d: bool(d.get('clientId')),
+         lambda ref, d: ref.where('clientId', '==', d['clientId']).order_by('createdAt', direction=DESCENDING)),
+        # TechnicianDashboard / technician/requests: servicios asignados
+        ('technician_by_date',
+         lambda d: bool(d.get('technicianId')),
+         lambda ref, d: ref.where('technicianId', '==', d['technicianId']).order_by('createdAt', direction=DESCENDING))
+    ],
+    'users': [
+        # page.tsx / Footer: técnicos destacados
+        ('featured_technicians',
+         lambda d: d.get('userType') == 'technician' and d.get('isActive'),
+         lambda ref, d: ref.where('userType', '==', 'technician').where('isActive', '==', True)
+                           .order_by('rating', direction=DESCENDING))
+    ],
+    'reviews': [
+        # technicians/[id]: reseñas del técnico
+        ('technician_reviews',
+         lambda d: bool(d.get('technicianId')),
+         lambda ref, d: ref.where('technicianId', '==', d['technicianId']).order_by('createdAt', direction=DESCENDING))
+    ]
+}
+
+
+class VisibilitySampler:
+    def __init__(self, db, sample_rate=0.01, recorder=None, poll_interval=0.02,
+                 max_poll_interval=1.0, timeout=30.0, max_workers=4, max_pending=1000):
+        """Inicializar verificador
+
+        Cada muestra cuesta 1 lectura por id más 1 lectura (limit(1)) por
+        sondeo y forma, así que el coste de lectura escala con sample_rate y
+        no con el volumen de la carga. Si la cola de verificación se llena las
+        muestras se descartan (y se cuentan) en lugar de frenar la carga.
+        """
+        self.db = db
+        self.sample_rate = sample_rate
+        self.recorder = recorder
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.lags = {}
+        self.queue_waits = []
+        self.stats = {'sampled': 0, 'dropped': 0, 'missing': {}, 'errors': {}, 'reads': 0,
+                      'first_poll': {}}
+        self._queue = queue.Queue(maxsize=max_pending)
+        for i in range(max_workers):
+            threading.Thread(target=self._worker, name=f'visibility-{i}', daemon=True).start()
+
+    def observe(self, collection, docs):
+        """Llamar justo después de que el commit de un lote devuelve"""
+        committed = time.perf_counter()
+        for doc_id, data in docs:
+            if random.random() >= self.sample_rate:
+                continue
+            try:
+                self._queue.put_nowait((committed, collection, doc_id, data))
+            except queue.Full:
+                with self.lock:
+                    self.stats['dropped'] += 1
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            try:
+                self._verify(time.perf_counter(), *item)
+            except Exception as e:
+                self._count('errors', f"{item[1]}: {type(e).__name__}")
+            finally:
+                self._queue.task_done()
+
+    def _verify(self, dequeued, committed, collection, doc_id, data):
+        ref = self.db.collection(collection)
+        shapes = [(name, build) for name, applies, build in QUERY_SHAPES.get(collection, []) if applies(data)]
+        if not shapes:
+            return
+        # Lectura por id (fuertemente consistente): da los valores resueltos
+        # (SERVER_TIMESTAMP) y el cursor exacto, desempates incluidos
+        snapshot = ref.document(doc_id).get()
+        reads = 1
+        queue_wait = dequeued - committed
+        with self.lock:
+            self.stats['sampled'] += 1
+            self.queue_waits.append(queue_wait)
+        if self.recorder:
+            self.recorder.add_latency(f"visibility_{collection}_queue_wait", queue_wait)
+        if not snapshot.exists:
+            self._count('missing', f"{collection}.by_id")
+            with self.lock:
+                self.stats['reads'] += reads
+            return
+
+        pending = {name: build(ref, data).start_at(snapshot).limit(1) for name, build in shapes}
+        interval = self.poll_interval
+        first_poll = True
+        while pending:
+            for name, query in list(pending.items()):
+                # La query ve el estado del momento en que se envía, no el de la respuesta
+                sent = time.perf_counter()
+                try:
+                    results = query.get()
+                except Exception as e:
+                    # Típicamente un índice compuesto que falta (FailedPrecondition)
+                    self._count('errors', f"{name}: {type(e).__name__}")
+                    del pending[name]
+                    continue
+                reads += 1
+                if results and results[0].id == doc_id:
+                    lag = sent - committed
+                    if first_poll:
+                        # Ya visible al empezar a buscar (tras la cola y la lectura por id)
+                        self._count('first_poll', f"{collection}.{name}")
+                    with self.lock:
+                        self.lags.setdefault(f"{collection}.{name}", []).append(lag)
+                    if self.recorder:
+                        self.recorder.add_latency(f"visibility_{collection}_{name}", lag)
+                    del pending[name]
+            first_poll = False
+            if not pending:
+                break
+            if time.perf_counter() - committed > self.timeout:
+                for name in pending:
+                    self._count('missing', f"{collection}.{name}")
+                break
+            time.sleep(interval)
+            interval = min(interval * 1.5, self.max_poll_interval)
+        with self.lock:
+            self.stats['reads'] += reads
+
+    def _count(self, kind, key):
+        with self.lock:
+            self.stats[kind][key] = self.stats[kind].get(key, 0) + 1
+
+    def drain(self):
+        """Esperar a que terminen las verificaciones en curso (como máximo ~timeout)"""
+        self._queue.join()
+
+    def print_summary(self):
+        print(f"\n👁️  Visibilidad escritura -> consulta ({self.stats['sampled']} docs muestreados, "
+              f"{self.stats['reads']} lecturas, {self.stats['dropped']} descartados):")
+        for shape, lags in sorted(self.lags.items()):
+            lags = sorted(lags)
+            p50 = lags[len(lags) // 2]
+            p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+            print(f"   {shape:<34} n={len(lags):<5} p50={p50 * 1000:>7.1f}ms "
+                  f"p99={p99 * 1000:>7.1f}ms max={lags[-1] * 1000:>7.1f}ms")
+        if self.queue_waits:
+            waits = sorted(self.queue_waits)
+            print(f"   ⏳ Espera en la cola del verificador: p50={waits[len(waits) // 2] * 1000:.1f}ms "
+                  f"max={waits[-1] * 1000:.1f}ms")
+        for shape, count in sorted(self.stats['first_poll'].items()):
+            total = len(self.lags.get(shape, ())) or 1
+            print(f"   ℹ️  {shape}: {count / total * 100:.0f}% visibles en el primer sondeo "
+                  f"(retraso = cota superior: cola + lectura por id)")
+        for shape, count in sorted(self.stats['missing'].items()):
+            print(f"   ❌ {shape}: {count} documentos no aparecieron en {self.timeout:.0f}s")
+        for error, count in sorted(self.stats['errors'].items()):
+            print(f"   ⚠️  {error}: {count} consultas fallidas (¿falta el índice compuesto?)")
+        return {'lags': self.lags, 'queue_waits': self.queue_waits, **self.stats}
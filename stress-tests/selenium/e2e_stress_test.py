@@ -4,6 +4,8 @@ Pruebas E2E con Selenium para Teknigo
 Automatiza flujos de usuario completos
 """
 
+import os
+import sys
 import time
 import random
 from selenium import webdriver
@@ -11,18 +13,33 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.edge.service import Service
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import unittest
 from concurrent.futures import ThreadPoolExecutor
-import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../python-scripts'))
+from resource_monitor import ResourceMonitor
+from result_store import ResultStore, HIST_BASE
+from network_capture import NetworkCapture
+from perf_baseline import RunRecorder
 
 class TeknigoE2ETest:
-    def __init__(self, base_url="http://localhost:3000", headless=True):
+    def __init__(self, base_url="http://localhost:3000", headless=True, spill_dir='e2e-results',
+                 capture_dir=None, block_resources=False):
         self.base_url = base_url
         self.headless = headless
-        self.results = []
-        self.lock = threading.Lock()
+        # Captura CDP por petición y/o bloqueo de imágenes, fuentes y analítica
+        self.network = None
+        if capture_dir or block_resources:
+            self.network = NetworkCapture(capture_dir or 'network-capture', block_resources)
+        # Buffers por hilo con resúmenes incrementales (ver result_store.py); cada
+        # ejecución vuelca sus registros a su propio subdirectorio
+        if spill_dir:
+            spill_dir = os.path.join(spill_dir, time.strftime('%Y%m%d-%H%M%S'))
+        self.results = ResultStore(spill_dir=spill_dir)
+        # Flujos de varios segundos: ventanas de throughput de 10s para que no queden casi vacías
+        self.recorder = RunRecorder('e2e_selenium', HIST_BASE, window=10.0)
+        self.generator_summary = None
     def create_driver(self):
         """Crear instancia de Edge driver"""
         options = webdriver.EdgeOptions()
@@ -35,8 +52,16 @@ class TeknigoE2ETest:
         options.add_argument('--disable-gpu')
         options.add_argument('--window-size=1920,1080')
         
+        if self.network:
+            self.network.configure_options(options)
+        
+        # Importación diferida: webdriver_manager solo hace falta al crear drivers
+        from webdriver_manager.microsoft import EdgeChromiumDriverManager
         service = Service(EdgeChromiumDriverManager().install())
-        return webdriver.Edge(service=service, options=options)
+        driver = webdriver.Edge(service=service, options=options)
+        if self.network:
+            self.network.attach(driver)
+        return driver
 
     def test_page_load(self, driver, test_id):
         """Prueba básica - verificar que la página carga"""
@@ -69,8 +94,8 @@ class TeknigoE2ETest:
             result['error'] = f"Error loading page: {str(e)}"
             result['response_time'] = time.time() - start_time
         
-        with self.lock:
-            self.results.append(result)
+        self._collect_network(driver, '/', test_id)
+        self._record(result)
         
         return result
 
@@ -193,8 +218,8 @@ class TeknigoE2ETest:
             result['error'] = f"Error: {str(e)}"
             result['response_time'] = time.time() - start_time
         
-        with self.lock:
-            self.results.append(result)
+        self._collect_network(driver, '/login', test_id)
+        self._record(result)
         
         return result
 
@@ -248,8 +273,8 @@ class TeknigoE2ETest:
             result['error'] = f"Error: {str(e)}"
             result['response_time'] = time.time() - start_time
         
-        with self.lock:
-            self.results.append(result)
+        self._collect_network(driver, '/services/request', test_id)
+        self._record(result)
         
         return result
 
@@ -293,8 +318,8 @@ class TeknigoE2ETest:
             result['error'] = f"Error: {str(e)}"
             result['response_time'] = time.time() - start_time
         
-        with self.lock:
-            self.results.append(result)
+        self._collect_network(driver, '/technicians', test_id)
+        self._record(result)
         
         return result
 
@@ -305,6 +330,8 @@ class TeknigoE2ETest:
         print(f"⏱️  Duración: {test_duration} segundos")
         
         end_time = time.time() + test_duration
+        # include_children: mide la memoria de los navegadores y drivers lanzados
+        monitor = ResourceMonitor('e2e_selenium', include_children=True).start()
         
         def user_session(user_id):
             """Sesión de usuario individual"""
@@ -325,17 +352,52 @@ class TeknigoE2ETest:
                 driver.quit()
         
         # Ejecutar sesiones en paralelo
-        with ThreadPoolExecutor(max_workers=concurrent_users) as executor:
-            futures = []
-            for i in range(concurrent_users):
-                future = executor.submit(user_session, i + 1)
-                futures.append(future)
-            
-            # Esperar a que terminen todas las sesiones
-            for future in futures:
-                future.result()
+        try:
+            with ThreadPoolExecutor(max_workers=concurrent_users) as executor:
+                futures = []
+                for i in range(concurrent_users):
+                    future = executor.submit(user_session, i + 1)
+                    futures.append(future)
+                
+                # Esperar a que terminen todas las sesiones
+                for future in futures:
+                    future.result()
+        finally:
+            # Ya sin sesiones: registrar las peticiones que quedaron abiertas y cerrar los archivos
+            if self.network:
+                self.network.close()
         
+        monitor.stop()
         self.print_results()
+        if self.network:
+            self.network.print_summary()
+        self.generator_summary = monitor.print_summary()
+        self.save_run()
+    
+    def _collect_network(self, driver, route, test_id):
+        """Atribuir al flujo los eventos de red de su navegación, también tras timeouts/errores
+
+        Si no, sus peticiones se atribuirían al siguiente flujo de la sesión.
+        """
+        if not self.network:
+            return
+        try:
+            self.network.collect(driver, route, test_id)
+        except Exception as e:
+            print(f"⚠️  No se pudo leer el log de red de {test_id}: {e}")
+
+    def _record(self, result):
+        self.results.record(result)
+        self.recorder.add_completions(result['test_type'])
+
+    def save_run(self):
+        """Guardar las distribuciones de la ejecución para perf_baseline.py"""
+        test_types, _ = self.results.summary()
+        if not test_types:
+            return None
+        for test_type, stats in test_types.items():
+            self.recorder.add_histogram(test_type, HIST_BASE, stats.histogram)
+        return self.recorder.save()
 
     def print_results(self):
         """Mostrar resultados de las pruebas"""
@@ -343,13 +405,16 @@ class TeknigoE2ETest:
             print("❌ No hay resultados para mostrar")
             return
         
+        self.results.flush()
+        test_types, error_counts = self.results.summary()
+        
         print("\n" + "="*60)
         print("📊 RESULTADOS DE PRUEBAS E2E")
         print("="*60)
         
         # Estadísticas generales
-        total_tests = len(self.results)
-        successful_tests = len([r for r in self.results if r['success']])
+        total_tests = sum(stats.count for stats in test_types.values())
+        successful_tests = sum(stats.successes for stats in test_types.values())
         failed_tests = total_tests - successful_tests
         
         print(f"Total de pruebas: {total_tests}")
@@ -358,55 +423,46 @@ class TeknigoE2ETest:
         print(f"📈 Tasa de éxito: {(successful_tests/total_tests)*100:.2f}%")
         
         # Estadísticas por tipo de prueba
-        test_types = {}
-        for result in self.results:
-            test_type = result['test_type']
-            if test_type not in test_types:
-                test_types[test_type] = {'total': 0, 'successful': 0, 'times': []}
-            
-            test_types[test_type]['total'] += 1
-            if result['success']:
-                test_types[test_type]['successful'] += 1
-            
-            if 'response_time' in result:
-                test_types[test_type]['times'].append(result['response_time'])
-        
         print(f"\n📊 Estadísticas por tipo de prueba:")
         for test_type, stats in test_types.items():
-            success_rate = (stats['successful']/stats['total'])*100
-            avg_time = sum(stats['times'])/len(stats['times']) if stats['times'] else 0
+            success_rate = (stats.successes/stats.count)*100
+            avg_time = stats.total_time/stats.count
             
             print(f"  {test_type}:")
             print(f"    Tasa de éxito: {success_rate:.2f}%")
             print(f"    Tiempo promedio: {avg_time:.2f}s")
+            print(f"    p50/p95/p99: {stats.percentile(50):.2f}s / "
+                  f"{stats.percentile(95):.2f}s / {stats.percentile(99):.2f}s")
         
         # Mostrar errores más comunes
-        errors = [r['error'] for r in self.results if r['error']]
-        if errors:
+        if error_counts:
             print(f"\n🚨 Errores más comunes:")
-            error_counts = {}
-            for error in errors:
-                error_counts[error] = error_counts.get(error, 0) + 1
-            
             for error, count in sorted(error_counts.items(), key=lambda x: x[1], reverse=True)[:5]:
                 print(f"  {error}: {count} veces")
 
-def main():
-    """Función principal"""
+# Configuración por defecto (master_stress_test.py la sobrescribe con archivo/flags)
+DEFAULT_CONFIG = {
+    'base_url': 'http://localhost:3000',
+    'concurrent_users': 1,  # Empezar con 1 usuario para debug
+    'test_duration': 30,    # 30 segundos para prueba rápida
+    'headless': False,      # Cambiar a False para ver el navegador
+    'spill_dir': 'e2e-results',  # Registros binarios por resultado (None = solo resúmenes)
+    'capture_dir': None,    # Directorio para registros de red CDP (None = sin captura)
+    'block_resources': False  # Bloquear imágenes/fuentes/analítica (modo throughput)
+}
+
+def run(config):
+    """Ejecutar las pruebas E2E con una configuración completa"""
     print("🔍 PRUEBAS E2E CON SELENIUM - TEKNIGO")
     print("="*50)
-      # Configuración
-    config = {
-        'base_url': 'http://localhost:3000',
-        'concurrent_users': 1,  # Empezar con 1 usuario para debug
-        'test_duration': 30,    # 30 segundos para prueba rápida
-        'headless': False       # Cambiar a False para ver el navegador
-    }
     
     # Crear instancia de pruebas
     e2e_test = TeknigoE2ETest(
         base_url=config['base_url'],
-        headless=config['headless']
+        headless=config['headless'],
+        spill_dir=config['spill_dir'],
+        capture_dir=config['capture_dir'],
+        block_resources=config['block_resources']
     )
     
     # Ejecutar pruebas
@@ -415,5 +471,9 @@ def main():
         test_duration=config['test_duration']
     )
 
+def main():
+    """Función principal"""
+    run(DEFAULT_CONFIG)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Captura de Red vía CDP para Pruebas E2E - Teknigo
+Lee los eventos Network.* del log de rendimiento del navegador, los guarda
+como registros compactos por petición (NDJSON) y atribuye tiempo y bytes por
+categoría de recurso y ruta. También permite bloquear imágenes, fuentes y
+analítica para que quepan más sesiones por máquina
+"""
+
+import os
+import json
+import threading
+from urllib.parse import urlparse
+
+# Recursos que no afectan la lógica de la app (modo throughput)
+BLOCKED_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf',
+    '*google-analytics.com*', '*googletagmanager.com*', '*firebaselogging*'
+]
+# Peticiones abiertas retenidas por hilo a la espera de su finalización
+MAX_PENDING = 500
+
+
+def categorize(url, resource_type):
+    """Clasificar una petición en una categoría útil para el análisis"""
+    parsed = urlparse(url)
+    host, path = parsed.netloc, parsed.path
+    if 'firestore.googleapis.com' in host:
+        # Listen/channel es el long-poll de onSnapshot
+        return 'firestore_listen' if '/Listen/' in path else 'firestore'
+    if 'identitytoolkit' in host or 'securetoken' in host:
+        return 'auth'
+    if 'google-analytics' in host or 'googletagmanager' in host or 'firebaselogging' in host:
+        return 'analytics'
+    if path.startswith('/_next/static/chunks') or resource_type == 'Script':
+        return 'js'
+    if resource_type == 'Stylesheet' or path.endswith('.css'):
+        return 'css'
+    if resource_type == 'Font':
+        return 'font'
+    if resource_type == 'Image':
+        return 'image'
+    if resource_type == 'Document':
+        return 'document'
+    if resource_type in ('XHR', 'Fetch'):
+        return 'api'
+    return 'other'
+
+
+def _span(timing, start, end):
+    """Duración (ms) entre dos hitos de ResourceTiming; -1 significa no aplica"""
+    if timing.get(start, -1) < 0 or timing.get(end, -1) < 0:
+        return None
+    return round(timing[end] - timing[start], 1)
+
+
+class NetworkCapture:
+    def __init__(self, output_dir, block_resources=False):
+        """Inicializar captura; cada hilo escribe en su propio archivo"""
+        self.output_dir = output_dir
+        self.block_resources = block_resources
+        self._local = threading.local()
+        self._lock = threading.Lock()  # solo para registrar hilos nuevos
+        self._states = []
+        os.makedirs(output_dir, exist_ok=True)
+
+    def configure_options(self, options):
+        """Activar el log de rendimiento (eventos CDP) en las opciones de Edge"""
+        options.set_capability('ms:loggingPrefs', {'performance': 'ALL'})
+        if self.block_resources:
+            options.add_argument('--blink-settings=imagesEnabled=false')
+
+    def attach(self, driver):
+        """Aplicar el bloqueo de recursos a una sesión recién creada"""
+        driver.execute_cdp_cmd('Network.enable', {})
+        if self.block_resources:
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_PATTERNS})
+
+    def _thread_state(self):
+        state = getattr(self._local, 'state', None)
+        if state is None:
+            with self._lock:
+                index = len(self._states)
+                path = os.path.join(self.output_dir, f"network-{index:04d}.ndjson")
+                # pending: peticiones sin loadingFinished/Failed todavía, con la ruta que las lanzó
+                state = self._local.state = {'file': open(path, 'a', encoding='utf-8'),
+                                             'aggregate': {}, 'pending': {}}
+                self._states.append(state)
+        return state
+
+    @staticmethod
+    def _parse(entries, requests, route, test_id):
+        """Reconstruir peticiones a partir de los eventos Network.* del log
+
+        requests son las pendientes de lecturas anteriores: sus eventos de
+        finalización pueden llegar en esta. Devuelve las que terminaron.
+        """
+        finished = []
+        for entry in entries:
+            message = json.loads(entry['message'])['message']
+            method = message.get('method', '')
+            if not method.startswith('Network.'):
+                continue
+            params = message['params']
+            request_id = params.get('requestId')
+            if method == 'Network.requestWillBeSent':
+                requests[request_id] = {
+                    'url': params['request']['url'],
+                    'type': params.get('type', 'Other'),
+                    'start': params['timestamp'],
+                    'cache': 'network',
+                    'route': route,
+                    'test_id': test_id
+                }
+                continue
+            request = requests.get(request_id)
+            if request is None:
+                continue
+            if method == 'Network.responseReceived':
+                response = params['response']
+                request['type'] = params.get('type', request['type'])
+                request['status'] = response.get('status')
+                request['protocol'] = response.get('protocol')
+                if response.get('fromDiskCache'):
+                    request['cache'] = 'disk'
+                elif response.get('fromServiceWorker'):
+                    request['cache'] = 'sw'
+                timing = response.get('timing')
+                if timing:
+                    request['dns'] = _span(timing, 'dnsStart', 'dnsEnd')
+                    request['connect'] = _span(timing, 'connectStart', 'connectEnd')
+                    request['ssl'] = _span(timing, 'sslStart', 'sslEnd')
+                    request['ttfb'] = _span(timing, 'sendStart', 'receiveHeadersEnd')
+            elif method == 'Network.requestServedFromCache':
+                request['cache'] = 'memory'
+            elif method == 'Network.loadingFinished':
+                request['end'] = params['timestamp']
+                request['bytes'] = params.get('encodedDataLength', 0)
+                finished.append(requests.pop(request_id))
+            elif method == 'Network.loadingFailed':
+                request['end'] = params['timestamp']
+                request['error'] = params.get('blockedReason') or params.get('errorText')
+                finished.append(requests.pop(request_id))
+        return finished
+
+    def collect(self, driver, route, test_id):
+        """Vaciar el log de la sesión y registrar las peticiones terminadas
+
+        Cada petición se atribuye a la ruta y prueba que la lanzaron; las que
+        siguen abiertas se guardan hasta que llegue su finalización.
+        """
+        state = self._thread_state()
+        finished = self._parse(driver.get_log('performance'), state['pending'], route, test_id)
+        # Los long-poll (Listen de Firestore) pueden no terminar nunca: acotar las pendientes
+        while len(state['pending']) > MAX_PENDING:
+            oldest = next(iter(state['pending']))
+            finished.append(state['pending'].pop(oldest))
+        self._write(state, finished)
+
+    def _write(self, state, requests):
+        lines = []
+        for request in requests:
+            aggregate = state['aggregate'].setdefault(request['route'], {})
+            category = categorize(request['url'], request['type'])
+            # Sin 'end' la petición sigue abierta (p. ej. long-poll de Firestore)
+            duration = (request['end'] - request['start']) * 1000 if 'end' in request else None
+            record = {
+                't': request['test_id'],
+                'r': request['route'],
+                'c': category,
+                'u': request['url'][:200],
+                's': request.get('status'),
+                'b': request.get('bytes', 0),
+                'd': round(duration, 1) if duration is not None else None,
+                'ttfb': request.get('ttfb'),
+                'dns': request.get('dns'),
+                'conn': request.get('connect'),
+                'ssl': request.get('ssl'),
+                'cache': request['cache'],
+                'err': request.get('error')
+            }
+            lines.append(json.dumps({k: v for k, v in record.items() if v is not None}, separators=(',', ':')))
+
+            stats = aggregate.setdefault(category, {'requests': 0, 'bytes': 0, 'time_ms': 0.0,
+                                                     'cached': 0, 'open': 0, 'failed': 0})
+            stats['requests'] += 1
+            stats['bytes'] += record['b']
+            if duration is None:
+                stats['open'] += 1
+            else:
+                stats['time_ms'] += duration
+            if request['cache'] != 'network':
+                stats['cached'] += 1
+            if 'error' in request:
+                stats['failed'] += 1
+        if lines:
+            state['file'].write('\n'.join(lines) + '\n')
+            state['file'].flush()
+
+    def close(self):
+        """Registrar como abiertas las peticiones que nunca terminaron y cerrar los archivos
+
+        Llamar cuando ya no quedan sesiones en marcha.
+        """
+        for state in list(self._states):
+            if state['file'].closed:
+                continue
+            self._write(state, state['pending'].values())
+            state['pending'].clear()
+            state['file'].close()
+
+    def summary(self):
+        """Fusionar los agregados de todos los hilos: {ruta: {categoría: stats}}"""
+        merged = {}
+        for state in list(self._states):
+            for route, categories in list(state['aggregate'].items()):
+                for category, stats in list(categories.items()):
+                    target = merged.setdefault(route, {}).setdefault(category, dict.fromkeys(stats, 0))
+                    for key, value in stats.items():
+                        target[key] += value
+        return merged
+
+    def print_summary(self):
+        summary = self.summary()
+        if not summary:
+            return summary
+        print(f"\n🌐 Tiempo de red por ruta y categoría (suma por petición):")
+        for route, categories in summary.items():
+            total_time = sum(s['time_ms'] for s in categories.values()) or 1
+            print(f"  {route}:")
+            for category, stats in sorted(categories.items(), key=lambda x: x[1]['time_ms'], reverse=True):
+                print(f"    {category:<17} {stats['requests']:>5} req  {stats['bytes'] / 1024:>9.1f} KB  "
+                      f"{stats['time_ms']:>9.0f} ms ({stats['time_ms'] / total_time * 100:>5.1f}%)  "
+                      f"caché {stats['cached']}  abiertas {stats['open']}  fallidas {stats['failed']}")
+        print(f"  💾 Registros por petición en {self.output_dir}")
+        return summary
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Almacén Compacto de Resultados E2E - Teknigo
+Guarda resultados en buffers circulares por hilo con registros de ancho fijo
+y resúmenes incrementales, para soak tests de varias horas sin memoria
+creciente ni contención de un lock global
+"""
+
+import os
+import re
+import json
+import math
+import struct
+import threading
+from array import array
+
+# type_id, latencia (s), error_id (0 = sin error), éxito
+RECORD = struct.Struct('<HdIB')
+# Histograma logarítmico: ~5% de precisión relativa en percentiles
+HIST_BASE = 1.05
+_LOG_HIST_BASE = math.log(HIST_BASE)
+_HIST_BINS = 320
+# Tablas de textos acotadas: los tipos de prueba son pocos; los errores distintos
+# por encima del límite se cuentan juntos en OTHER_ERRORS
+MAX_TEST_TYPES = 1024
+MAX_ERRORS = 4096
+MAX_ERROR_LENGTH = 160
+OTHER_ERRORS = '(otros errores)'
+_VARIABLE_PARTS = re.compile(r'0x[0-9a-fA-F]+|\b[0-9a-fA-F]{8,}\b|\d+')
+
+
+def normalize_error(text):
+    """Agrupar errores equivalentes: primera línea, sin ids ni números, truncada
+
+    Los mensajes de Selenium incluyen la pila del driver, ids de sesión y
+    direcciones de memoria que harían único cada error.
+    """
+    first_line = text.strip().split('\n', 1)[0]
+    return _VARIABLE_PARTS.sub('#', first_line)[:MAX_ERROR_LENGTH]
+
+
+class _StringTable:
+    """Textos internados con ids compactos; al llenarse devuelve overflow_id"""
+
+    def __init__(self, limit, first=(), overflow=None):
+        self.limit = limit
+        self.strings = {}
+        self.list = list(first)
+        self.lock = threading.Lock()
+        self.overflow_id = self._add(overflow) if overflow else None
+
+    def _add(self, text):
+        string_id = len(self.list)
+        self.list.append(text)
+        self.strings[text] = string_id
+        return string_id
+
+    def intern(self, text):
+        string_id = self.strings.get(text)
+        if string_id is None:
+            with self.lock:
+                string_id = self.strings.get(text)
+                if string_id is None:
+                    if len(self.list) >= self.limit:
+                        if self.overflow_id is None:
+                            raise ValueError(f"Más de {self.limit} textos distintos")
+                        return self.overflow_id
+                    string_id = self._add(text)
+        return string_id
+
+
+class _TypeSummary:
+    """Agregados O(1) por registro para un tipo de prueba"""
+
+    __slots__ = ('count', 'successes', 'total_time', 'min_time', 'max_time', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.successes = 0
+        self.total_time = 0.0
+        self.min_time = math.inf
+        self.max_time = 0.0
+        self.histogram = array('I', bytes(4 * _HIST_BINS))
+
+    def add(self, latency, success):
+        self.count += 1
+        self.successes += success
+        self.total_time += latency
+        self.min_time = min(self.min_time, latency)
+        self.max_time = max(self.max_time, latency)
+        millis = max(latency * 1000, 1.0)
+        self.histogram[min(_HIST_BINS - 1, int(math.log(millis) / _LOG_HIST_BASE))] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.successes += other.successes
+        self.total_time += other.total_time
+        self.min_time = min(self.min_time, other.min_time)
+        self.max_time = max(self.max_time, other.max_time)
+        for i, value in enumerate(other.histogram):
+            self.histogram[i] += value
+
+    def percentile(self, pct):
+        """Percentil aproximado (segundos) a partir del histograma"""
+        target = math.ceil(pct / 100 * self.count)
+        seen = 0
+        for i, value in enumerate(self.histogram):
+            seen += value
+            if seen >= target and value:
+                return min(math.exp((i + 1) * _LOG_HIST_BASE) / 1000, self.max_time)
+        return self.max_time
+
+
+class _ThreadBuffer:
+    """Buffer circular de un solo hilo: no necesita lock para escribir"""
+
+    def __init__(self, capacity, spill_path):
+        self.capacity = capacity
+        self.spill_path = spill_path
+        self.type_ids = array('H', bytes(2 * capacity))
+        self.latencies = array('d', bytes(8 * capacity))
+        self.error_ids = array('I', bytes(4 * capacity))
+        self.successes = bytearray(capacity)
+        self.size = 0
+        self.summaries = {}
+        self.error_counts = {}
+        self.spilled = 0
+
+    def add(self, type_id, latency, error_id, success):
+        if self.size == self.capacity:
+            self._spill()
+        i = self.size
+        self.type_ids[i] = type_id
+        self.latencies[i] = latency
+        self.error_ids[i] = error_id
+        self.successes[i] = success
+        self.size += 1
+
+        summary = self.summaries.get(type_id)
+        if summary is None:
+            summary = self.summaries[type_id] = _TypeSummary()
+        summary.add(latency, success)
+        if error_id:
+            self.error_counts[error_id] = self.error_counts.get(error_id, 0) + 1
+
+    def _spill(self):
+        """Volcar el buffer lleno a disco (o descartarlo si no hay spill_path)
+
+        Los resúmenes ya están calculados, así que descartar no pierde estadísticas.
+        """
+        if self.spill_path:
+            with open(self.spill_path, 'ab') as f:
+                for i in range(self.size):
+                    f.write(RECORD.pack(self.type_ids[i], self.latencies[i],
+                                        self.error_ids[i], self.successes[i]))
+            self.spilled += self.size
+        self.size = 0
+
+
+class ResultStore:
+    def __init__(self, capacity_per_thread=4096, spill_dir=None):
+        """Inicializar almacén
+
+        Con spill_dir cada hilo vuelca sus registros a su propio archivo
+        binario al llenarse el buffer; sin él, el buffer se reutiliza.
+        """
+        self.capacity = capacity_per_thread
+        self.spill_dir = spill_dir
+        self._local = threading.local()
+        self._buffers = []
+        self._types = _StringTable(MAX_TEST_TYPES)
+        # id 0 reservado para "sin error"
+        self._errors = _StringTable(MAX_ERRORS, first=[None], overflow=OTHER_ERRORS)
+        self._lock = threading.Lock()  # solo para registrar hilos nuevos
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def _buffer(self):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            with self._lock:
+                spill_path = None
+                if self.spill_dir:
+                    spill_path = os.path.join(self.spill_dir, f"results-{len(self._buffers):04d}.bin")
+                buffer = self._local.buffer = _ThreadBuffer(self.capacity, spill_path)
+                self._buffers.append(buffer)
+        return buffer
+
+    def record(self, result):
+        """Guardar un resultado con el formato de dict de TeknigoE2ETest"""
+        error = result.get('error')
+        self._buffer().add(
+            self._types.intern(result['test_type']),
+            float(result.get('response_time', 0.0)),
+            self._errors.intern(normalize_error(error)) if error else 0,
+            1 if result['success'] else 0
+        )
+
+    def __len__(self):
+        return sum(s.count for b in list(self._buffers) for s in list(b.summaries.values()))
+
+    def summary(self):
+        """Fusionar los agregados de todos los hilos"""
+        by_type = {}
+        errors = {}
+        for buffer in list(self._buffers):
+            for type_id, summary in list(buffer.summaries.items()):
+                merged = by_type.setdefault(self._types.list[type_id], _TypeSummary())
+                merged.merge(summary)
+            for error_id, count in list(buffer.error_counts.items()):
+                text = self._errors.list[error_id]
+                errors[text] = errors.get(text, 0) + count
+        return by_type, errors
+
+    def flush(self):
+        """Volcar lo pendiente y guardar las tablas de textos internados"""
+        if not self.spill_dir:
+            return
+        for buffer in list(self._buffers):
+            buffer._spill()
+        with open(os.path.join(self.spill_dir, 'strings.json'), 'w', encoding='utf-8') as f:
+            json.dump({'test_types': self._types.list, 'errors': self._errors.list}, f, ensure_ascii=False)